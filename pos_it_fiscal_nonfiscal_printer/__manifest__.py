@@ -5,7 +5,9 @@
     'category': 'Point of Sale',
     'author': 'Generated',
     'depends': ['point_of_sale'],
-    'data': [],
+    'data': [
+        'security/ir.model.access.csv',
+    ],
     'installable': True,
     'application': False,
 }
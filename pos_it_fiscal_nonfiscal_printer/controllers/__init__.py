@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import hw_proxy
+from . import printer_controller
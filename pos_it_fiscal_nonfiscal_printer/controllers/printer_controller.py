@@ -0,0 +1,979 @@
+# -*- coding: utf-8 -*-
+# Server-side printing endpoints (DEVELOPMENT.md checklist item 6).
+#
+# The PoS frontend polls the status routes every few seconds per register and
+# calls the print routes on demand; printer I/O itself lives in the driver
+# adapters, the controller only orchestrates config lookup, driver calls and
+# status bookkeeping.
+import hashlib
+import json
+import logging
+import socket
+import threading
+import functools
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+try:
+    import gevent
+    import gevent.monkey
+except ImportError:
+    gevent = None
+
+# gevent imports fine in every deployment (Odoo depends on it for the
+# longpolling worker), but spawn() only yields during I/O when the socket
+# module is monkey-patched. In prefork workers sockets block the hub, so
+# greenlets give neither the deadline nor the overlap; those deployments
+# must take the thread paths.
+_GEVENT_COOPERATIVE = gevent is not None and gevent.monkey.is_module_patched('socket')
+
+import odoo
+from odoo import SUPERUSER_ID, api, http
+from odoo.http import request
+from odoo.tools import date_utils
+
+from ..drivers.base import TransientPrinterError
+from ..services.printer_factory import PrinterFactory
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+
+def _install_orjson_responses():
+    """Serialize JSON route responses with orjson when possible.
+
+    The status routes are polled continuously by every register, so the
+    stdlib json.dumps in Request.make_json_response is pure per-poll CPU.
+    orjson encodes straight to bytes several times faster. Datetimes are
+    passed through to date_utils.json_default so the wire format stays the
+    space-separated one the web client parses (orjson's native ISO-8601
+    "T" form would silently change every module's responses). Anything
+    neither encoder handles falls back to the stock encoder, and the patch
+    is skipped entirely when the http layer does not look like we expect.
+    """
+    if orjson is None or not hasattr(http, 'Request'):
+        return
+    original = getattr(http.Request, 'make_json_response', None)
+    if original is None or getattr(original, '_orjson_patched', False):
+        return
+    from werkzeug.datastructures import Headers
+
+    encode_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def make_json_response(self, data, headers=None, cookies=None, status=200):
+        try:
+            body = orjson.dumps(
+                data, option=encode_options, default=date_utils.json_default)
+        except (TypeError, orjson.JSONEncodeError):
+            return original(self, data, headers=headers, cookies=cookies, status=status)
+        headers = Headers(headers)
+        headers['Content-Length'] = str(len(body))
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = 'application/json; charset=utf-8'
+        return self.make_response(body, headers.to_wsgi_list(), cookies, status)
+
+    make_json_response._orjson_patched = True
+    http.Request.make_json_response = make_json_response
+
+_install_orjson_responses()
+
+# Expected failure modes of a networked printer: logged as warnings without
+# the traceback machinery, which matters when an offline printer fails a
+# 1 Hz status poll for hours.
+_TRANSIENT_EXCEPTIONS = (socket.timeout, ConnectionError, FutureTimeoutError, TransientPrinterError)
+if gevent is not None:
+    _TRANSIENT_EXCEPTIONS += (gevent.Timeout,)
+
+# preformatted constant error responses (callers never mutate these)
+_ERR_MISSING_CONFIG_ID = {'success': False, 'message': 'Missing pos_config_id'}
+_ERR_UNKNOWN_CONFIG_ID = {'success': False, 'message': 'Unknown pos_config_id'}
+_ERR_FISCAL_DISABLED = {'success': False, 'message': 'Fiscal printer not enabled'}
+_ERR_NONFISCAL_DISABLED = {'success': False, 'message': 'Order printer not enabled'}
+_ERR_MISSING_RECEIPT_DATA = {'success': False, 'message': 'Missing receipt_data'}
+_ERR_MISSING_ORDER_DATA = {'success': False, 'message': 'Missing order_data'}
+_ERR_MISSING_OPS = {'success': False, 'message': 'Missing ops'}
+_ERR_ACCESS_DENIED = {'success': False, 'message': 'Access denied'}
+
+# Param validation: one precompiled JSON-schema check per op. fastjsonschema
+# generates the validator code at import time, so the per-request cost is a
+# single call; without the library the manual per-field checks in the
+# implementations remain the only validation.
+_PARAM_VALIDATORS = {}
+if fastjsonschema is not None:
+    _BASE_SCHEMA = {
+        'type': 'object',
+        'required': ['pos_config_id'],
+        'properties': {'pos_config_id': {'type': 'integer', 'minimum': 1}},
+    }
+    _RECEIPT_SCHEMA = {
+        'type': 'object',
+        'required': ['pos_config_id', 'receipt_data'],
+        'properties': {
+            'pos_config_id': {'type': 'integer', 'minimum': 1},
+            'receipt_data': {
+                'type': 'object',
+                'properties': {
+                    'items': {'type': 'array', 'default': []},
+                    'payments': {'type': 'array', 'default': []},
+                },
+            },
+        },
+    }
+    _COMANDA_SCHEMA = {
+        'type': 'object',
+        'required': ['pos_config_id', 'order_data'],
+        'properties': {
+            'pos_config_id': {'type': 'integer', 'minimum': 1},
+            'order_data': {'type': 'object'},
+        },
+    }
+    _PARAM_VALIDATORS = {
+        '_fiscal_status_impl': fastjsonschema.compile(_BASE_SCHEMA),
+        '_fiscal_print_receipt_impl': fastjsonschema.compile(_RECEIPT_SCHEMA),
+        '_fiscal_z_report_impl': fastjsonschema.compile(_BASE_SCHEMA),
+        '_nonfiscal_status_impl': fastjsonschema.compile(_BASE_SCHEMA),
+        '_nonfiscal_print_comanda_impl': fastjsonschema.compile(_COMANDA_SCHEMA),
+        '_config_impl': fastjsonschema.compile(_BASE_SCHEMA),
+    }
+
+
+def _validate_params(handler_name, params):
+    """Return an error message when params fail the op's schema, else None."""
+    validator = _PARAM_VALIDATORS.get(handler_name)
+    if validator is None:
+        return None
+    try:
+        validator(params)
+    except fastjsonschema.JsonSchemaException as e:
+        return str(e)
+    return None
+
+def _has_pos_access():
+    """Same gate as hw_proxy: internal users or PoS users only.
+
+    auth='user' alone also admits portal users, and everything below runs
+    through the superuser env, so each entry point checks this first.
+    """
+    user = request.env.user
+    return (
+        user._is_internal()
+        or user.has_group('point_of_sale.group_pos_user')
+        or user.has_group('point_of_sale.group_pos_manager')
+    )
+
+
+def _sudo_env():
+    """One superuser environment per request.
+
+    Each .sudo() call builds a fresh Environment (new uid, new cache
+    partition); the handlers here may need privileged model access several
+    times per call, so the env is built once and stashed on the request.
+    """
+    env = getattr(request, '_printer_sudo_env', None)
+    if env is None:
+        env = api.Environment(request.env.cr, SUPERUSER_ID, {})
+        request._printer_sudo_env = env
+    return env
+
+
+# pos.config printer settings change only when an administrator edits them, so
+# serve them from a short-TTL in-memory cache instead of hitting the ORM on
+# every poll. Entries: pos_config_id -> (expiry_ts, fiscal_cfg, nonfiscal_cfg,
+# fiscal_enabled, nonfiscal_enabled).
+_CONFIG_CACHE = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
+_CONFIG_CACHE_TTL = 30.0
+
+
+def _get_cached_config(pos_config_id):
+    """Return (fiscal_cfg, nonfiscal_cfg, fiscal_enabled, nonfiscal_enabled)
+    for a pos.config, reading from the DB at most once per TTL window.
+
+    Returns None when the pos.config does not exist (never cached).
+    """
+    now = time.monotonic()
+    with _CONFIG_CACHE_LOCK:
+        entry = _CONFIG_CACHE.get(pos_config_id)
+        if entry is not None and entry[0] > now:
+            return entry[1:]
+    pos_config = _sudo_env()['pos.config'].browse(pos_config_id)
+    if not pos_config.exists():
+        return None
+    fiscal_cfg = pos_config.get_fiscal_printer_config()
+    nonfiscal_cfg = pos_config.get_nonfiscal_printer_config()
+    entry = (
+        now + _CONFIG_CACHE_TTL,
+        fiscal_cfg,
+        nonfiscal_cfg,
+        pos_config.fiscal_printer_enabled,
+        pos_config.nonfiscal_printer_enabled,
+    )
+    with _CONFIG_CACHE_LOCK:
+        _CONFIG_CACHE[pos_config_id] = entry
+    return entry[1:]
+
+
+def _invalidate_config_cache(pos_config_id=None):
+    with _CONFIG_CACHE_LOCK:
+        if pos_config_id is None:
+            _CONFIG_CACHE.clear()
+            _CONFIG_ETAG_CACHE.clear()
+        else:
+            _CONFIG_CACHE.pop(pos_config_id, None)
+            _CONFIG_ETAG_CACHE.pop(pos_config_id, None)
+
+
+# Preserialized config payloads for the HTTP (ETag) config route. The config
+# only changes when an administrator edits it, so the common case is a 304
+# with no ORM access and no serialization at all. Entries:
+# pos_config_id -> (expiry_ts, etag, payload_bytes). pos.config.write()
+# invalidates this together with _CONFIG_CACHE, but only in its own worker
+# process; the TTL bounds how long the other workers keep serving the old
+# payload, same as the JSON config route. The etag is a digest of the
+# payload, so refreshes of an unchanged config keep revalidating to 304.
+_CONFIG_ETAG_CACHE = {}
+
+
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('ascii')
+
+
+def _get_serialized_config(pos_config_id):
+    """Return (etag, payload_bytes) for a pos.config, or None when unknown."""
+    now = time.monotonic()
+    with _CONFIG_CACHE_LOCK:
+        entry = _CONFIG_ETAG_CACHE.get(pos_config_id)
+    if entry is not None and entry[0] > now:
+        return entry[1:]
+    config = _get_cached_config(pos_config_id)
+    if config is None:
+        return None
+    fiscal_cfg, nonfiscal_cfg, fiscal_enabled, nonfiscal_enabled = config
+    payload = _dumps({
+        'fiscal': {'enabled': fiscal_enabled, **fiscal_cfg},
+        'nonfiscal': {'enabled': nonfiscal_enabled, **nonfiscal_cfg},
+    })
+    etag = hashlib.blake2b(payload, digest_size=8).hexdigest()
+    entry = (now + _CONFIG_CACHE_TTL, etag, payload)
+    with _CONFIG_CACHE_LOCK:
+        _CONFIG_ETAG_CACHE[pos_config_id] = entry
+    return entry[1:]
+
+
+class _StatusFlusher:
+    """Write-back buffer for pos.printer.status rows.
+
+    Status polls arrive every few seconds per register; persisting each one
+    costs an UPDATE + commit per poll. Instead the endpoints submit the latest
+    state here and a daemon thread flushes it in batch every couple of
+    seconds, skipping states identical to what was last persisted. Losing a
+    buffered update on shutdown is acceptable: the next poll recreates it.
+    """
+
+    FLUSH_INTERVAL = 2.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}    # (dbname, kind, pos_config_id) -> payload tuple
+        self._persisted = {}  # same key -> (status, ready, message)
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def submit(self, dbname, kind, pos_config_id, status, ready, message='', response_time_ms=0.0):
+        key = (dbname, kind, pos_config_id)
+        with self._lock:
+            self._pending[key] = (status, ready, message, response_time_ms)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='pos_printer_status_flusher', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(timeout=self.FLUSH_INTERVAL)
+            self._wakeup.clear()
+            time.sleep(self.FLUSH_INTERVAL)
+            try:
+                self._flush()
+            except Exception:
+                _logger.exception("Printer status flush failed")
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        by_db = {}
+        for key, payload in pending.items():
+            # coalesce identical consecutive states (response time excluded)
+            if self._persisted.get(key) == payload[:3]:
+                continue
+            by_db.setdefault(key[0], []).append((key, payload))
+        for dbname, entries in by_db.items():
+            registry = odoo.registry(dbname)
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                status_model = env['pos.printer.status']
+                for (_dbname, kind, pos_config_id), payload in entries:
+                    if kind == 'fiscal':
+                        status_model.update_fiscal_status(pos_config_id, *payload)
+                    else:
+                        status_model.update_nonfiscal_status(pos_config_id, *payload)
+                cr.commit()
+            for key, payload in entries:
+                self._persisted[key] = payload[:3]
+
+
+_STATUS_FLUSHER = _StatusFlusher()
+
+# Registers poll printer status every few seconds but the printer state
+# changes far more slowly; memoize the last get_status() result per printer
+# for a short window so bursts of polls don't each touch the socket.
+_STATUS_CACHE = {}
+_STATUS_CACHE_LOCK = threading.Lock()
+_STATUS_CACHE_TTL = 1.0
+
+
+def _status_cache_get(kind, pos_config_id):
+    with _STATUS_CACHE_LOCK:
+        entry = _STATUS_CACHE.get((kind, pos_config_id))
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _status_cache_put(kind, pos_config_id, status_info):
+    with _STATUS_CACHE_LOCK:
+        _STATUS_CACHE[(kind, pos_config_id)] = (
+            time.monotonic() + _STATUS_CACHE_TTL, status_info)
+
+
+def _status_cache_invalidate(kind, pos_config_id):
+    with _STATUS_CACHE_LOCK:
+        _STATUS_CACHE.pop((kind, pos_config_id), None)
+
+
+# One operation at a time per printer, plus idempotency dedupe for prints.
+# Every op that touches an adapter - status polls and z-reports included, not
+# just receipt prints - takes the (kind, pos_config_id) lock for its whole
+# duration: the pooled adapters share one socket and one set of protocol
+# buffers per printer, so a CMD_STATUS frame sent mid-receipt would corrupt
+# the fiscal command sequence and misattribute the responses. Serializing at
+# this level also keeps the factory's in_use flag accurate, so the idle
+# reaper never closes a socket another thread still holds. Without the
+# print dedupe, a retry of an already-completed print would emit the receipt
+# (and the counter bump) twice.
+_PRINTER_LOCKS = defaultdict(threading.Lock)
+_IDEMPOTENCY_CACHE = OrderedDict()  # idempotency_key -> (expiry_ts, response)
+_IDEMPOTENCY_LOCK = threading.Lock()
+_IDEMPOTENCY_TTL = 300.0
+_IDEMPOTENCY_MAX = 1024
+
+
+def _idempotency_get(key):
+    now = time.monotonic()
+    with _IDEMPOTENCY_LOCK:
+        entry = _IDEMPOTENCY_CACHE.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del _IDEMPOTENCY_CACHE[key]
+            return None
+        return entry[1]
+
+
+# Below this line count the NumPy fixed overhead (array allocation, ufunc
+# dispatch) outweighs the per-element savings; small receipts stay in Python.
+_VECTORIZE_THRESHOLD = 32
+
+
+def _receipt_totals(items, payments):
+    """Return (items_total, payments_total) for a receipt payload.
+
+    Large takeout/catering receipts (hundreds of lines) are summed with
+    NumPy when available; small receipts and numpy-less deployments use the
+    plain generator path.
+    """
+    n = len(items)
+    if np is not None and n >= _VECTORIZE_THRESHOLD:
+        qty = np.fromiter(
+            (item.get('quantity', 1) for item in items), dtype=np.float64, count=n)
+        price = np.fromiter(
+            (item.get('unit_price', 0) for item in items), dtype=np.float64, count=n)
+        items_total = float((qty * price).sum())
+    else:
+        items_total = sum(
+            float(item.get('quantity', 1)) * float(item.get('unit_price', 0))
+            for item in items)
+    payments_total = sum(float(payment.get('amount', 0)) for payment in payments)
+    return items_total, payments_total
+
+
+def _idempotency_put(key, response):
+    with _IDEMPOTENCY_LOCK:
+        _IDEMPOTENCY_CACHE[key] = (time.monotonic() + _IDEMPOTENCY_TTL, response)
+        _IDEMPOTENCY_CACHE.move_to_end(key)
+        while len(_IDEMPOTENCY_CACHE) > _IDEMPOTENCY_MAX:
+            _IDEMPOTENCY_CACHE.popitem(last=False)
+
+
+# The open pos.session for a config changes only on session open/close, so
+# cache its id instead of re-searching after every fiscal receipt.
+_OPEN_SESSION_CACHE = {}  # pos_config_id -> (expiry_ts, session_id)
+_OPEN_SESSION_LOCK = threading.Lock()
+_OPEN_SESSION_TTL = 60.0
+
+
+# Off-thread execution of blocking printer I/O. A slow or dead printer must
+# not pin the HTTP worker for the whole socket timeout: on monkey-patched
+# deployments (workers=0 / the longpolling worker) printer calls become
+# cooperative greenlets, otherwise they run on a small dedicated thread
+# pool so the request thread at least enforces the deadline.
+_IO_POOL = None
+_IO_POOL_LOCK = threading.Lock()
+
+
+def _run_printer_io(func, timeout, *args, **kwargs):
+    """Run ``func`` (blocking printer I/O) with a hard deadline in seconds.
+
+    Raises gevent.Timeout or concurrent.futures.TimeoutError on expiry; the
+    endpoint error handling turns either into a failure response.
+    """
+    if _GEVENT_COOPERATIVE:
+        return gevent.spawn(func, *args, **kwargs).get(timeout=timeout)
+    global _IO_POOL
+    if _IO_POOL is None:
+        with _IO_POOL_LOCK:
+            if _IO_POOL is None:
+                _IO_POOL = ThreadPoolExecutor(
+                    max_workers=16, thread_name_prefix='pos_printer_io')
+    return _IO_POOL.submit(func, *args, **kwargs).result(timeout=timeout)
+
+
+def _map_printer_io(thunks):
+    """Run independent printer-bound callables concurrently, results in order.
+
+    With cooperative sockets the thunks become greenlets; otherwise each
+    gets a short-lived thread (not the _IO_POOL: the thunks themselves run
+    I/O through _run_printer_io, and nesting pool submissions can deadlock
+    a saturated pool). The thunks are expected to catch their own printer
+    errors; anything escaping is turned into a failure response.
+    """
+    if len(thunks) == 1:
+        # nothing to overlap with: run the lone thunk on the calling thread
+        # and skip the spawn/join round-trip
+        try:
+            return [thunks[0]()]
+        except Exception as e:
+            _logger.exception("Batched printer op failed")
+            return [{'success': False, 'message': str(e)}]
+    if _GEVENT_COOPERATIVE:
+        greenlets = [gevent.spawn(thunk) for thunk in thunks]
+        gevent.joinall(greenlets)
+        results = []
+        for greenlet in greenlets:
+            try:
+                results.append(greenlet.get())
+            except Exception as e:
+                _logger.exception("Batched printer op failed")
+                results.append({'success': False, 'message': str(e)})
+        return results
+    results = [None] * len(thunks)
+
+    def run(index, thunk):
+        try:
+            results[index] = thunk()
+        except Exception as e:
+            _logger.exception("Batched printer op failed")
+            results[index] = {'success': False, 'message': str(e)}
+
+    threads = [
+        threading.Thread(target=run, args=(index, thunk), daemon=True)
+        for index, thunk in enumerate(thunks)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class PrinterController(http.Controller):
+
+    # op name -> implementation method, shared by the single-op routes and
+    # the batch route. Implementations take (pos_config_id, config, params)
+    # where config is the _get_cached_config() tuple.
+    _BATCH_HANDLERS = {
+        'fiscal_status': '_fiscal_status_impl',
+        'fiscal_print_receipt': '_fiscal_print_receipt_impl',
+        'fiscal_z_report': '_fiscal_z_report_impl',
+        'nonfiscal_status': '_nonfiscal_status_impl',
+        'nonfiscal_print_comanda': '_nonfiscal_print_comanda_impl',
+        'config': '_config_impl',
+    }
+
+    # status ops are pure network wait and safe to fan out concurrently in
+    # a batch, one probe per (kind, pos.config)
+    _STATUS_HANDLER_KINDS = {
+        '_fiscal_status_impl': 'fiscal',
+        '_nonfiscal_status_impl': 'nonfiscal',
+    }
+
+    # field schema for the receipt item/payment loops: unpacked positionally
+    # so each iteration pays one dict lookup per field and nothing else
+    _ITEM_KEYS = ('description', 'quantity', 'unit_price', 'tax_percent')
+    _ITEM_DEFAULTS = ('ITEM', 1.0, 0.0, 0.0)
+    _PAYMENT_KEYS = ('type', 'amount')
+    _PAYMENT_DEFAULTS = ('cash', 0.0)
+
+    @staticmethod
+    def _invalidate_config(pos_config_id=None):
+        _invalidate_config_cache(pos_config_id)
+
+    def _dispatch_single(self, handler_name, params):
+        if not _has_pos_access():
+            return _ERR_ACCESS_DENIED
+        error = _validate_params(handler_name, params)
+        if error:
+            return {'success': False, 'message': error}
+        pos_config_id = params.get('pos_config_id')
+        if not pos_config_id:
+            return _ERR_MISSING_CONFIG_ID
+        config = _get_cached_config(pos_config_id)
+        if config is None:
+            return _ERR_UNKNOWN_CONFIG_ID
+        return getattr(self, handler_name)(pos_config_id, config, params)
+
+    # ---------------------------------------------------------------------
+    # Routes
+    # ---------------------------------------------------------------------
+
+    @http.route('/pos_printer/fiscal/status', type='json', auth='user', methods=['POST'], csrf=False)
+    def fiscal_printer_status(self, **params):
+        return self._dispatch_single('_fiscal_status_impl', params)
+
+    @http.route('/pos_printer/fiscal/print_receipt', type='json', auth='user', methods=['POST'], csrf=False)
+    def fiscal_print_receipt(self, **params):
+        return self._dispatch_single('_fiscal_print_receipt_impl', params)
+
+    @http.route('/pos_printer/fiscal/z_report', type='json', auth='user', methods=['POST'], csrf=False)
+    def fiscal_z_report(self, **params):
+        return self._dispatch_single('_fiscal_z_report_impl', params)
+
+    @http.route('/pos_printer/nonfiscal/status', type='json', auth='user', methods=['POST'], csrf=False)
+    def nonfiscal_printer_status(self, **params):
+        return self._dispatch_single('_nonfiscal_status_impl', params)
+
+    @http.route('/pos_printer/nonfiscal/print_comanda', type='json', auth='user', methods=['POST'], csrf=False)
+    def nonfiscal_print_comanda(self, **params):
+        return self._dispatch_single('_nonfiscal_print_comanda_impl', params)
+
+    @http.route('/pos_printer/config', type='json', auth='user', methods=['POST'], csrf=False)
+    def get_printer_config(self, **params):
+        return self._dispatch_single('_config_impl', params)
+
+    @http.route('/pos_printer/config/cached', type='http', auth='user', methods=['GET'], csrf=False)
+    def get_printer_config_cached(self, pos_config_id=None, **kwargs):
+        """HTTP variant of /pos_printer/config with ETag revalidation.
+
+        The config payload changes only when an administrator edits it, so the
+        PoS UI can poll this route with If-None-Match and get a 304 with no
+        ORM access and no serialization most of the time.
+        """
+        if not _has_pos_access():
+            return request.make_response(
+                _dumps(_ERR_ACCESS_DENIED), headers=[('Content-Type', 'application/json')],
+                status=403)
+        try:
+            pos_config_id = int(pos_config_id or 0)
+        except (TypeError, ValueError):
+            pos_config_id = 0
+        if not pos_config_id:
+            return request.make_response(
+                _dumps(_ERR_MISSING_CONFIG_ID), headers=[('Content-Type', 'application/json')],
+                status=400)
+        entry = _get_serialized_config(pos_config_id)
+        if entry is None:
+            return request.make_response(
+                _dumps(_ERR_UNKNOWN_CONFIG_ID), headers=[('Content-Type', 'application/json')],
+                status=404)
+        etag, payload = entry
+        headers = [('ETag', etag), ('Cache-Control', 'private, max-age=5')]
+        if request.httprequest.headers.get('If-None-Match') == etag:
+            return request.make_response('', headers=headers, status=304)
+        headers.append(('Content-Type', 'application/json'))
+        return request.make_response(payload, headers=headers)
+
+    @http.route('/pos_printer/batch', type='json', auth='user', methods=['POST'], csrf=False)
+    def pos_printer_batch(self, ops=None, **kwargs):
+        """Run several printer operations in one JSON-RPC round-trip.
+
+        Payload: {'ops': [{'op': <name>, 'params': {...}}, ...]}. The PoS UI
+        fires status + config together at startup and polls both printers
+        continuously; batching shares one request, one auth check and one
+        config resolution per pos.config across all ops.
+        """
+        if not _has_pos_access():
+            return _ERR_ACCESS_DENIED
+        if not isinstance(ops, list):
+            return _ERR_MISSING_OPS
+        dbname = request.env.cr.dbname
+        configs = {}
+        results = [None] * len(ops)
+        concurrent = []   # (index, thunk): independent status probes
+        sequential = []   # (index, handler_name, pos_config_id, config, params)
+        probed = set()    # (kind, pos_config_id) already in the concurrent group
+        for index, op in enumerate(ops):
+            name = op.get('op')
+            params = op.get('params') or {}
+            handler_name = self._BATCH_HANDLERS.get(name)
+            if handler_name is None:
+                results[index] = {'success': False, 'message': 'Unknown op %r' % name}
+                continue
+            error = _validate_params(handler_name, params)
+            if error:
+                results[index] = {'success': False, 'message': error}
+                continue
+            pos_config_id = params.get('pos_config_id')
+            if not pos_config_id:
+                results[index] = _ERR_MISSING_CONFIG_ID
+                continue
+            if pos_config_id not in configs:
+                configs[pos_config_id] = _get_cached_config(pos_config_id)
+            config = configs[pos_config_id]
+            if config is None:
+                results[index] = _ERR_UNKNOWN_CONFIG_ID
+                continue
+            kind = self._STATUS_HANDLER_KINDS.get(handler_name)
+            if kind is not None and (kind, pos_config_id) not in probed:
+                probed.add((kind, pos_config_id))
+                concurrent.append((index, functools.partial(
+                    getattr(self, handler_name), pos_config_id, config, params,
+                    dbname=dbname)))
+            else:
+                sequential.append((index, handler_name, pos_config_id, config, params))
+        # fan out the status probes: a batch probing both printers pays the
+        # slower probe instead of the sum of both
+        if concurrent:
+            probe_results = _map_printer_io([thunk for _index, thunk in concurrent])
+            for (index, _thunk), result in zip(concurrent, probe_results):
+                results[index] = result
+        for index, handler_name, pos_config_id, config, params in sequential:
+            results[index] = getattr(self, handler_name)(pos_config_id, config, params)
+        return {'success': True, 'results': results}
+
+    # ---------------------------------------------------------------------
+    # Implementations
+    # ---------------------------------------------------------------------
+
+    def _fiscal_status_impl(self, pos_config_id, config, params, dbname=None):
+        fiscal_config, _dummy, fiscal_enabled, _dummy2 = config
+        if not fiscal_enabled:
+            return _ERR_FISCAL_DISABLED
+        if dbname is None:
+            dbname = request.env.cr.dbname
+        # force=True (diagnostic UIs) bypasses the memoized status
+        if not params.get('force'):
+            cached = _status_cache_get('fiscal', pos_config_id)
+            if cached is not None:
+                return {'success': True, **cached}
+        with _PRINTER_LOCKS[('fiscal', pos_config_id)]:
+            return self._fiscal_status_locked(pos_config_id, fiscal_config, params, dbname)
+
+    def _fiscal_status_locked(self, pos_config_id, fiscal_config, params, dbname):
+        try:
+            io_timeout = fiscal_config.get('timeout', 10) + 1
+            printer, message = _run_printer_io(
+                PrinterFactory.get_or_connect, io_timeout, 'fiscal', pos_config_id, fiscal_config)
+            if printer is None:
+                _STATUS_FLUSHER.submit(
+                    dbname, 'fiscal', pos_config_id, 'offline', False, message)
+                return {'success': True, 'status': 'offline', 'ready': False, 'message': message}
+            start_ns = time.perf_counter_ns()
+            status_info = _run_printer_io(printer.get_status, io_timeout)
+            elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            if params.get('want_timing'):
+                status_info['response_time_ms'] = elapsed_ms
+            _status_cache_put('fiscal', pos_config_id, status_info)
+            _STATUS_FLUSHER.submit(
+                dbname, 'fiscal', pos_config_id,
+                status_info['status'],
+                status_info['ready'],
+                status_info.get('message', ''),
+                elapsed_ms,
+            )
+            return {'success': True, **status_info}
+        except _TRANSIENT_EXCEPTIONS as e:
+            _logger.warning("Fiscal printer transient failure: %s", e)
+            return {'success': True, 'status': 'offline', 'ready': False, 'message': str(e)}
+        except Exception as e:
+            _logger.exception("Fiscal printer status check failed")
+            return {'success': False, 'message': str(e)}
+        finally:
+            PrinterFactory.release('fiscal', pos_config_id)
+
+    def _fiscal_print_receipt_impl(self, pos_config_id, config, params):
+        idempotency_key = params.get('idempotency_key')
+        if idempotency_key:
+            cached = _idempotency_get(idempotency_key)
+            if cached is not None:
+                return cached
+        with _PRINTER_LOCKS[('fiscal', pos_config_id)]:
+            if idempotency_key:
+                # a concurrent retry may have printed while we waited
+                cached = _idempotency_get(idempotency_key)
+                if cached is not None:
+                    return cached
+            response = self._fiscal_print_receipt_locked(pos_config_id, config, params)
+        if idempotency_key and response.get('success'):
+            _idempotency_put(idempotency_key, response)
+        return response
+
+    def _fiscal_print_receipt_locked(self, pos_config_id, config, params):
+        receipt_data = params.get('receipt_data')
+        if not receipt_data:
+            return _ERR_MISSING_RECEIPT_DATA
+        fiscal_config, _dummy, fiscal_enabled, _dummy2 = config
+        if not fiscal_enabled:
+            return _ERR_FISCAL_DISABLED
+        items = receipt_data.get('items', [])
+        payments = receipt_data.get('payments', [])
+        # balance check before any printer I/O: an unbalanced receipt would
+        # only fail at close_receipt(), after wasting the whole command
+        # sequence on the fiscal printer
+        if items and payments:
+            items_total, payments_total = _receipt_totals(items, payments)
+            if abs(items_total - payments_total) > 0.005:
+                return {
+                    'success': False,
+                    'message': 'Receipt total %.2f does not match payments total %.2f'
+                               % (items_total, payments_total),
+                }
+        try:
+            printer, message = PrinterFactory.get_or_connect('fiscal', pos_config_id, fiscal_config)
+            if printer is None:
+                return {'success': False, 'message': message}
+            if fiscal_config.get('supports_batching'):
+                # one write + one read for the whole receipt; a failing
+                # command status fails the receipt, which also covers the
+                # fail_safe contract
+                frame, command_count = printer.build_receipt(items, payments)
+                success, result, _statuses = printer.send_and_close(frame, command_count)
+                if not success:
+                    return {'success': False, 'message': result}
+                receipt_number = result
+            else:
+                success, message = printer.open_receipt()
+                if not success:
+                    return {'success': False, 'message': message}
+                add_item = printer.add_item
+                process_payment = printer.process_payment
+                fail_safe = fiscal_config.get('fail_safe')
+                item_schema = tuple(zip(self._ITEM_KEYS, self._ITEM_DEFAULTS))
+                payment_schema = tuple(zip(self._PAYMENT_KEYS, self._PAYMENT_DEFAULTS))
+                for item in items:
+                    description, quantity, unit_price, tax_percent = (
+                        item.get(key, default) for key, default in item_schema)
+                    success, message = add_item(
+                        description, float(quantity), float(unit_price), float(tax_percent))
+                    if not success and fail_safe:
+                        return {'success': False, 'message': message}
+                for payment in payments:
+                    payment_type, amount = (
+                        payment.get(key, default) for key, default in payment_schema)
+                    success, message = process_payment(payment_type, float(amount))
+                    if not success and fail_safe:
+                        return {'success': False, 'message': message}
+                success, receipt_number = printer.close_receipt()
+                if not success:
+                    return {'success': False, 'message': receipt_number}
+            self._bump_fiscal_receipts(pos_config_id)
+            # next poll must see the post-print printer state
+            _status_cache_invalidate('fiscal', pos_config_id)
+            _STATUS_FLUSHER.submit(
+                request.env.cr.dbname, 'fiscal', pos_config_id, 'ready', True,
+                'receipt %s printed' % receipt_number)
+            return {'success': True, 'receipt_number': receipt_number}
+        except _TRANSIENT_EXCEPTIONS as e:
+            _logger.warning("Fiscal printer transient failure during receipt: %s", e)
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            _logger.exception("Fiscal receipt printing failed")
+            return {'success': False, 'message': str(e)}
+        finally:
+            PrinterFactory.release('fiscal', pos_config_id)
+
+    @staticmethod
+    def _bump_fiscal_receipts(pos_config_id):
+        """Increment fiscal_receipts_count on the open session.
+
+        Uses a cached session id plus a raw SQL increment so the per-receipt
+        hot path skips the ORM search and the read/write/tracking round-trip
+        of an ORM assignment. Falls back to the ORM path when the cached
+        session raced with a close.
+        """
+        now = time.monotonic()
+        with _OPEN_SESSION_LOCK:
+            entry = _OPEN_SESSION_CACHE.get(pos_config_id)
+        session_id = entry[1] if entry is not None and entry[0] > now else None
+        session_model = _sudo_env()['pos.session']
+        try:
+            if session_id is None:
+                session = session_model.search([
+                    ('config_id', '=', pos_config_id),
+                    ('state', '=', 'opened'),
+                ], limit=1)
+                if not session:
+                    return
+                session_id = session.id
+                with _OPEN_SESSION_LOCK:
+                    _OPEN_SESSION_CACHE[pos_config_id] = (now + _OPEN_SESSION_TTL, session_id)
+            request.env.cr.execute(
+                "UPDATE pos_session SET fiscal_receipts_count = fiscal_receipts_count + 1"
+                " WHERE id = %s AND state = 'opened'",
+                (session_id,),
+            )
+            if request.env.cr.rowcount:
+                session_model.browse(session_id).invalidate_recordset(['fiscal_receipts_count'])
+                return
+            # cached session was closed in the meantime: retry via the ORM
+            with _OPEN_SESSION_LOCK:
+                _OPEN_SESSION_CACHE.pop(pos_config_id, None)
+            session = session_model.search([
+                ('config_id', '=', pos_config_id),
+                ('state', '=', 'opened'),
+            ], limit=1)
+            if session:
+                session.fiscal_receipts_count += 1
+        except Exception:
+            _logger.exception("Could not update fiscal receipt counter")
+
+    def _fiscal_z_report_impl(self, pos_config_id, config, params):
+        fiscal_config, _dummy, fiscal_enabled, _dummy2 = config
+        if not fiscal_enabled:
+            return _ERR_FISCAL_DISABLED
+        with _PRINTER_LOCKS[('fiscal', pos_config_id)]:
+            return self._fiscal_z_report_locked(pos_config_id, fiscal_config)
+
+    def _fiscal_z_report_locked(self, pos_config_id, fiscal_config):
+        try:
+            printer, message = PrinterFactory.get_or_connect('fiscal', pos_config_id, fiscal_config)
+            if printer is None:
+                return {'success': False, 'message': message}
+            success, message = printer.z_report()
+            return {'success': success, 'message': message}
+        except _TRANSIENT_EXCEPTIONS as e:
+            _logger.warning("Fiscal printer transient failure during Z report: %s", e)
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            _logger.exception("Fiscal Z report failed")
+            return {'success': False, 'message': str(e)}
+        finally:
+            PrinterFactory.release('fiscal', pos_config_id)
+
+    def _nonfiscal_status_impl(self, pos_config_id, config, params, dbname=None):
+        _dummy, nonfiscal_config, _dummy2, nonfiscal_enabled = config
+        if not nonfiscal_enabled:
+            return _ERR_NONFISCAL_DISABLED
+        if dbname is None:
+            dbname = request.env.cr.dbname
+        # force=True (diagnostic UIs) bypasses the memoized status
+        if not params.get('force'):
+            cached = _status_cache_get('nonfiscal', pos_config_id)
+            if cached is not None:
+                return {'success': True, **cached}
+        with _PRINTER_LOCKS[('nonfiscal', pos_config_id)]:
+            return self._nonfiscal_status_locked(pos_config_id, nonfiscal_config, params, dbname)
+
+    def _nonfiscal_status_locked(self, pos_config_id, nonfiscal_config, params, dbname):
+        try:
+            io_timeout = nonfiscal_config.get('timeout', 10) + 1
+            printer, message = _run_printer_io(
+                PrinterFactory.get_or_connect, io_timeout, 'nonfiscal', pos_config_id, nonfiscal_config)
+            if printer is None:
+                _STATUS_FLUSHER.submit(
+                    dbname, 'nonfiscal', pos_config_id, 'offline', False, message)
+                return {'success': True, 'status': 'offline', 'ready': False, 'message': message}
+            start_ns = time.perf_counter_ns()
+            status_info = _run_printer_io(printer.get_status, io_timeout)
+            elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            if params.get('want_timing'):
+                status_info['response_time_ms'] = elapsed_ms
+            _status_cache_put('nonfiscal', pos_config_id, status_info)
+            _STATUS_FLUSHER.submit(
+                dbname, 'nonfiscal', pos_config_id,
+                status_info['status'],
+                status_info['ready'],
+                status_info.get('message', ''),
+                elapsed_ms,
+            )
+            return {'success': True, **status_info}
+        except _TRANSIENT_EXCEPTIONS as e:
+            _logger.warning("Order printer transient failure: %s", e)
+            return {'success': True, 'status': 'offline', 'ready': False, 'message': str(e)}
+        except Exception as e:
+            _logger.exception("Order printer status check failed")
+            return {'success': False, 'message': str(e)}
+        finally:
+            PrinterFactory.release('nonfiscal', pos_config_id)
+
+    def _nonfiscal_print_comanda_impl(self, pos_config_id, config, params):
+        order_data = params.get('order_data')
+        if not order_data:
+            return _ERR_MISSING_ORDER_DATA
+        _dummy, nonfiscal_config, _dummy2, nonfiscal_enabled = config
+        if not nonfiscal_enabled:
+            return _ERR_NONFISCAL_DISABLED
+        with _PRINTER_LOCKS[('nonfiscal', pos_config_id)]:
+            return self._nonfiscal_print_comanda_locked(pos_config_id, nonfiscal_config, order_data)
+
+    def _nonfiscal_print_comanda_locked(self, pos_config_id, nonfiscal_config, order_data):
+        try:
+            printer, message = PrinterFactory.get_or_connect('nonfiscal', pos_config_id, nonfiscal_config)
+            if printer is None:
+                return {'success': False, 'message': message}
+            success, message = printer.print_comanda(
+                order_data,
+                auto_cut=nonfiscal_config.get('auto_cut', True),
+                open_drawer=nonfiscal_config.get('open_drawer', False),
+            )
+            if success:
+                # next poll must see the post-print printer state
+                _status_cache_invalidate('nonfiscal', pos_config_id)
+            _STATUS_FLUSHER.submit(
+                request.env.cr.dbname, 'nonfiscal', pos_config_id,
+                'ready' if success else 'error', success, message)
+            return {'success': success, 'message': message}
+        except _TRANSIENT_EXCEPTIONS as e:
+            _logger.warning("Order printer transient failure during comanda: %s", e)
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            _logger.exception("Comanda printing failed")
+            return {'success': False, 'message': str(e)}
+        finally:
+            PrinterFactory.release('nonfiscal', pos_config_id)
+
+    def _config_impl(self, pos_config_id, config, params):
+        fiscal_config, nonfiscal_config, fiscal_enabled, nonfiscal_enabled = config
+        return {
+            'success': True,
+            'fiscal': {'enabled': fiscal_enabled, **fiscal_config},
+            'nonfiscal': {'enabled': nonfiscal_enabled, **nonfiscal_config},
+        }
@@ -0,0 +1,149 @@
+# Hot byte-level codec helpers, factored out of the adapters.
+#
+# Everything in this module is pure byte manipulation: no sockets, no Odoo
+# imports, full type annotations. That makes it a self-contained compilation
+# unit - building it with mypyc (the compiled extension shadows this file at
+# import time with no code changes) or porting it to Cython gives the
+# parsers and the comanda builder a native inner loop while the adapters
+# keep importing the same names.
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# --------------------------------------------------------------------------
+# SF20 response parsing
+# --------------------------------------------------------------------------
+
+STATE_RECEIPT_CLOSED = 'ready'
+STATE_RECEIPT_OPEN = 'receipt_open'
+STATE_Z_REQUIRED = 'z_required'
+STATE_MEMORY_FULL = 'memory_full'
+STATE_ERROR = 'error'
+
+_STATUS_MARKER_RE = re.compile(rb'READY|RECEIPT_OPEN|Z_REQUIRED|MEMORY_FULL|ERROR')
+_STATUS_MARKERS: Dict[bytes, Tuple[str, bool]] = {
+    b'READY': (STATE_RECEIPT_CLOSED, True),
+    b'RECEIPT_OPEN': (STATE_RECEIPT_OPEN, True),
+    b'Z_REQUIRED': (STATE_Z_REQUIRED, False),
+    b'MEMORY_FULL': (STATE_MEMORY_FULL, False),
+    b'ERROR': (STATE_ERROR, False),
+}
+_RECEIPT_NUMBER_RE = re.compile(rb'(\d{1,10})')
+_ERROR_RE = re.compile(rb'ERROR.{0,45}', re.DOTALL)
+
+
+def parse_status(response: bytes) -> Tuple[str, bool]:
+    """One-pass status parse; the earliest marker in the response wins."""
+    match = _STATUS_MARKER_RE.search(response)
+    if match is None:
+        return STATE_ERROR, False
+    return _STATUS_MARKERS[match.group(0)]
+
+
+def parse_receipt_number(response: bytes) -> str:
+    match = _RECEIPT_NUMBER_RE.search(response)
+    if match:
+        return match.group(1).decode('ascii')
+    return 'UNKNOWN'
+
+
+def parse_error(response: bytes) -> str:
+    # error markers sit at the front of real firmware frames; bound the
+    # scan so a corrupt jumbo frame cannot cost a full-buffer search
+    match = _ERROR_RE.search(response, 0, 256)
+    if match:
+        return match.group(0).decode('ascii', errors='ignore')
+    return 'unknown printer error'
+
+
+def is_success(response: bytes, eot_idx: Optional[int] = None) -> bool:
+    # The ACK byte typically sits immediately before the EOT terminator;
+    # since _next_frame returns exact frames the EOT position is simply the
+    # last byte, making this a constant-time window check. The bounded head
+    # scan stays as the fallback for firmware that leads with OK and for
+    # partial frames without a terminator.
+    if eot_idx is None and response.endswith(b'\x04'):
+        eot_idx = len(response) - 1
+    if eot_idx is not None and eot_idx > 0:
+        tail = response[max(0, eot_idx - 4):eot_idx]
+        if 0x06 in tail or b'OK' in tail:
+            return True
+    head = response[:16]
+    return b'OK' in head or b'\x06' in head
+
+
+# --------------------------------------------------------------------------
+# ESC/POS commands and comanda building
+# --------------------------------------------------------------------------
+
+LF = b'\n'
+
+CMD_INIT = b'\x1b@'
+CMD_ALIGN_LEFT = b'\x1ba\x00'
+CMD_ALIGN_CENTER = b'\x1ba\x01'
+CMD_ALIGN_RIGHT = b'\x1ba\x02'
+CMD_BOLD_ON = b'\x1bE\x01'
+CMD_BOLD_OFF = b'\x1bE\x00'
+CMD_UNDERLINE_ON = b'\x1b-\x01'
+CMD_UNDERLINE_OFF = b'\x1b-\x00'
+CMD_SIZE_NORMAL = b'\x1d!\x00'
+CMD_SIZE_DOUBLE = b'\x1d!\x11'
+CMD_PARTIAL_CUT = b'\x1dV\x01'
+CMD_FULL_CUT = b'\x1dV\x00'
+CMD_OPEN_DRAWER = b'\x1bp\x00\x19\xfa'
+CMD_STATUS_QUERY = b'\x10\x04\x01'
+
+_COMANDA_HEADER_PREFIX = CMD_INIT + CMD_ALIGN_CENTER + CMD_SIZE_DOUBLE + CMD_BOLD_ON
+_COMANDA_HEADER_SUFFIX = CMD_BOLD_OFF + CMD_SIZE_NORMAL
+
+
+def build_comanda_parts(order_data: Dict[str, Any], width: int, sep_line: bytes) -> List[bytes]:
+    """Build the comanda document as a list of byte pieces.
+
+    Layout matches example/main.py: centered header, service block, one
+    line per item (with optional notes), timestamp footer. The caller ships
+    the list as-is (scatter-gather) or joins it once.
+    """
+    service = order_data.get('service', {})
+    parts = [
+        _COMANDA_HEADER_PREFIX,
+        b'COMANDA', LF,
+        service.get('type', '').encode('utf-8', errors='ignore'), LF,
+        _COMANDA_HEADER_SUFFIX,
+        sep_line,
+        CMD_ALIGN_LEFT,
+        CMD_BOLD_ON,
+    ]
+    append = parts.append
+    if service.get('tavolo'):
+        append(f'Tavolo: {service["tavolo"]}'.encode('utf-8', errors='ignore') + LF)
+    else:
+        append(b'Banco' + LF)
+    if service.get('sala'):
+        append(f'Sala: {service["sala"]}'.encode('utf-8', errors='ignore') + LF)
+    if service.get('operatore'):
+        append(f'Operatore: {service["operatore"]}'.encode('utf-8', errors='ignore') + LF)
+    if service.get('coperti'):
+        append(f'Coperto: {service["coperti"]}'.encode('utf-8', errors='ignore') + LF)
+    append(CMD_BOLD_OFF)
+    append(sep_line)
+
+    for item in order_data.get('lines', []):
+        if isinstance(item, bytes):
+            # pre-encoded line from a caller that already built it
+            append(item[:width] + LF)
+            continue
+        qty = item.get('qty', 1)
+        # slice in unicode space before encoding: truncating the encoded
+        # bytes could cut a UTF-8 multibyte character in half
+        append(f'{int(qty)}x {item.get("description", "")}'[:width]
+               .encode('utf-8', errors='ignore') + LF)
+        notes = item.get('notes')
+        if notes:
+            append(f'  {notes}'[:width].encode('utf-8', errors='ignore') + LF)
+
+    append(sep_line)
+    append(CMD_ALIGN_CENTER)
+    if order_data.get('datetime'):
+        append(order_data['datetime'].encode('utf-8', errors='ignore') + LF)
+    append(LF)
+    return parts
@@ -0,0 +1,329 @@
+# Asyncio counterparts of the TCP printer adapters.
+#
+# The sync adapters in sf20_tcp/escpos_tcp stay the primary API (the pooled
+# factory and the controller are thread-based); these subclasses replace only
+# the transport with asyncio streams so coroutine-based callers can fan out
+# over many printers concurrently. Protocol parsing, encoding and document
+# building are inherited unchanged.
+import asyncio
+import time
+
+from .base import TransientPrinterError, apply_socket_options
+from .escpos_tcp import ESCPOSPrinterAdapter
+from .sf20_tcp import SF20FiscalPrinterAdapter, _cents
+
+
+class AsyncSF20FiscalPrinterAdapter(SF20FiscalPrinterAdapter):
+    """SF20 protocol over asyncio streams.
+
+    Same lifecycle and return conventions as the sync adapter, with the
+    I/O-touching methods as coroutines. Not thread-safe and not safe for
+    concurrent use on one instance: callers hold the pool lock (see
+    get_fiscal_adapter) for the duration of an operation.
+    """
+
+    def __init__(self, ip, port=9100, timeout=10, socket_options=()):
+        super().__init__(ip, port, timeout, socket_options)
+        self._reader = None
+        self._writer = None
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    async def connect(self):
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port), self.timeout)
+            sock = self._writer.get_extra_info('socket')
+            if sock is not None:
+                apply_socket_options(sock, self.socket_options, self.timeout)
+            return True, 'connected'
+        except (asyncio.TimeoutError, OSError) as e:
+            self._reader = self._writer = None
+            return False, str(e)
+
+    async def disconnect(self):
+        if self._writer is not None:
+            try:
+                self._writer.close()
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._reader = self._writer = None
+
+    async def _send_command(self, command, data=b''):
+        if self._writer is None:
+            raise TransientPrinterError('fiscal printer not connected')
+        self._writer.write(self.SF20_HEADER + command + data + self.SF20_EOT)
+        await self._writer.drain()
+        return await self._receive_response()
+
+    async def _receive_response(self):
+        # mirror of the sync adapter's incremental scan: EOT can only show
+        # up in the newly read chunk, so never re-scan accumulated bytes
+        response = bytearray()
+        eot = self.SF20_EOT
+        scan_from = 0
+        while True:
+            chunk = await asyncio.wait_for(self._reader.read(4096), self.timeout)
+            if not chunk:
+                break
+            scan_from = len(response)
+            response += chunk
+            if response.find(eot, scan_from) >= 0:
+                break
+        return bytes(response)
+
+    async def get_status(self):
+        response = await self._send_command(self.CMD_STATUS)
+        status, ready = self._parse_status_response(response)
+        return {'status': status, 'ready': ready, 'message': ''}
+
+    async def open_receipt(self):
+        response = await self._send_command(self.CMD_OPEN)
+        if self._is_success_response(response):
+            return True, 'receipt opened'
+        return False, self._parse_error_response(response)
+
+    async def add_item(self, description, quantity, unit_price, tax_percent):
+        data = self._encode_item(
+            description, _cents(quantity), _cents(unit_price), int(tax_percent))
+        response = await self._send_command(self.CMD_ITEM, data)
+        if self._is_success_response(response):
+            return True, 'item added'
+        return False, self._parse_error_response(response)
+
+    async def process_payment(self, payment_type, amount):
+        payment_code = self._encode_payment_type(payment_type)
+        data = self._encode_payment(payment_code, _cents(amount))
+        response = await self._send_command(self.CMD_PAYMENT, data)
+        if self._is_success_response(response):
+            return True, 'payment accepted'
+        return False, self._parse_error_response(response)
+
+    async def close_receipt(self):
+        response = await self._send_command(self.CMD_CLOSE)
+        if self._is_success_response(response):
+            return True, self._parse_receipt_number(response)
+        return False, self._parse_error_response(response)
+
+    async def z_report(self):
+        response = await self._send_command(self.CMD_Z_REPORT)
+        if self._is_success_response(response):
+            return True, 'Z report printed'
+        return False, self._parse_error_response(response)
+
+    async def send_and_close(self, frame, expected_responses):
+        if self._writer is None:
+            raise TransientPrinterError('fiscal printer not connected')
+        self._writer.write(frame)
+        await self._writer.drain()
+        responses = await self._receive_frames(expected_responses)
+        statuses = [self._is_success_response(response) for response in responses]
+        for response, ok in zip(responses, statuses):
+            if not ok:
+                return False, self._parse_error_response(response), statuses
+        if len(responses) < expected_responses:
+            return False, 'incomplete response from printer', statuses
+        return True, self._parse_receipt_number(responses[-1]), statuses
+
+    async def _receive_frames(self, count):
+        # consumed tracks the start of the next frame, scan_from the end of
+        # the region already verified EOT-free; no slicing, no re-scanning
+        buffer = bytearray()
+        frames = []
+        eot = self.SF20_EOT
+        consumed = 0
+        scan_from = 0
+        while len(frames) < count:
+            idx = buffer.find(eot, max(consumed, scan_from))
+            if idx >= 0:
+                frames.append(bytes(buffer[consumed:idx + 1]))
+                consumed = idx + 1
+                continue
+            scan_from = len(buffer)
+            chunk = await asyncio.wait_for(self._reader.read(4096), self.timeout)
+            if not chunk:
+                break
+            buffer += chunk
+        return frames
+
+
+class AsyncESCPOSPrinterAdapter(ESCPOSPrinterAdapter):
+    """ESC/POS over asyncio streams; document builders are inherited."""
+
+    def __init__(self, ip, port=9100, timeout=10, width=32, socket_options=()):
+        super().__init__(ip, port, timeout, width, socket_options)
+        self._reader = None
+        self._writer = None
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    async def connect(self):
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port), self.timeout)
+            sock = self._writer.get_extra_info('socket')
+            if sock is not None:
+                apply_socket_options(sock, self.socket_options, self.timeout)
+            await self._send_raw(self.CMD_INIT)
+            return True, 'connected'
+        except (asyncio.TimeoutError, OSError) as e:
+            self._reader = self._writer = None
+            return False, str(e)
+
+    async def disconnect(self):
+        if self._writer is not None:
+            try:
+                self._writer.close()
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._reader = self._writer = None
+
+    async def _send_raw(self, data):
+        if self._writer is None:
+            raise TransientPrinterError('order printer not connected')
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            self._writer.write(data)
+        else:
+            self._writer.writelines(data)
+        await self._writer.drain()
+
+    async def get_status(self):
+        now = time.monotonic()
+        if self._last_status is not None and now - self._last_probe_ts < self.status_cache_ttl:
+            return self._last_status
+        await self._send_raw(self.CMD_STATUS_QUERY)
+        try:
+            data = await asyncio.wait_for(self._reader.read(1), self.timeout)
+            status_byte = data[0] if data else None
+        except (asyncio.TimeoutError, OSError):
+            status_byte = None
+        if status_byte is None:
+            status = {'status': 'error', 'ready': False, 'message': 'no status response'}
+        else:
+            offline = bool(status_byte & 0x08)
+            status = {
+                'status': 'offline' if offline else 'ready',
+                'ready': not offline,
+                'message': '',
+            }
+        self._last_probe_ts = now
+        self._last_status = status
+        return status
+
+    async def print_text(self, text, align='left', bold=False, underline=False):
+        try:
+            await self._send_raw(self._format_text(text, align, bold, underline))
+            return True, 'text printed'
+        except (asyncio.TimeoutError, OSError) as e:
+            return False, str(e)
+
+    async def print_comanda(self, order_data, auto_cut=True, open_drawer=False):
+        try:
+            parts = self._build_comanda_parts(order_data)
+            if auto_cut:
+                parts.append(self.CMD_PARTIAL_CUT)
+            if open_drawer:
+                parts.append(self.CMD_OPEN_DRAWER)
+            await self._send_raw(parts)
+            return True, 'comanda printed'
+        except (asyncio.TimeoutError, OSError) as e:
+            return False, str(e)
+
+    async def cut_paper(self, partial=True):
+        try:
+            await self._send_raw(self.CMD_PARTIAL_CUT if partial else self.CMD_FULL_CUT)
+            return True, 'paper cut'
+        except (asyncio.TimeoutError, OSError) as e:
+            return False, str(e)
+
+    async def open_drawer(self):
+        try:
+            await self._send_raw(self.CMD_OPEN_DRAWER)
+            return True, 'drawer opened'
+        except (asyncio.TimeoutError, OSError) as e:
+            return False, str(e)
+
+    async def line_feed(self, lines=1):
+        try:
+            await self._send_raw(self.LF * lines)
+            return True, 'fed'
+        except (asyncio.TimeoutError, OSError) as e:
+            return False, str(e)
+
+
+# One adapter per printer endpoint, shared across coroutines. The lock
+# serializes operations on a given printer (fiscal protocols are stateful;
+# ESC/POS documents must not interleave) while distinct printers proceed
+# concurrently.
+_POOL = {}  # (kind, ip, port) -> (adapter, asyncio.Lock)
+_POOL_GUARD = None  # asyncio.Lock protecting _POOL itself, created lazily
+
+
+def _pool_guard():
+    global _POOL_GUARD
+    if _POOL_GUARD is None:
+        _POOL_GUARD = asyncio.Lock()
+    return _POOL_GUARD
+
+
+async def _get_pooled(kind, key, factory):
+    async with _pool_guard():
+        entry = _POOL.get((kind,) + key)
+        if entry is None:
+            entry = (factory(), asyncio.Lock())
+            _POOL[(kind,) + key] = entry
+    return entry
+
+
+async def get_fiscal_adapter(ip, port=9100, timeout=10):
+    """Return (adapter, lock) for a fiscal printer endpoint, pooled.
+
+    Callers do ``adapter, lock = await get_fiscal_adapter(...)`` then hold
+    the lock for the whole operation, reconnecting via adapter.connect()
+    when adapter.connected is false.
+    """
+    return await _get_pooled(
+        'fiscal', (ip, port),
+        lambda: AsyncSF20FiscalPrinterAdapter(ip, port, timeout))
+
+
+async def get_escpos_adapter(ip, port=9100, timeout=10, width=32):
+    """Return (adapter, lock) for an ESC/POS endpoint, pooled."""
+    return await _get_pooled(
+        'nonfiscal', (ip, port),
+        lambda: AsyncESCPOSPrinterAdapter(ip, port, timeout, width))
+
+
+async def print_comande_fanout(jobs):
+    """Print several comande concurrently, one coroutine per job.
+
+    ``jobs`` is a list of (adapter, order_data) pairs where adapter is an
+    AsyncESCPOSPrinterAdapter (typically from get_escpos_adapter). Jobs on
+    distinct printers run in true parallel inside one event loop - total
+    latency is the slowest printer, not the sum - while jobs sharing an
+    adapter serialize on its pool lock so documents never interleave.
+    Returns one (success, message) pair per job, in order; a job whose
+    printer cannot be reached reports the connect error.
+    """
+    locks = {}
+    for adapter, _order_data in jobs:
+        if id(adapter) not in locks:
+            locks[id(adapter)] = _POOL.get(
+                ('nonfiscal', adapter.ip, adapter.port), (None, None))[1] or asyncio.Lock()
+
+    async def run(adapter, order_data):
+        async with locks[id(adapter)]:
+            if not adapter.connected:
+                success, message = await adapter.connect()
+                if not success:
+                    return False, message
+            return await adapter.print_comanda(order_data)
+
+    return await asyncio.gather(
+        *(run(adapter, order_data) for adapter, order_data in jobs))
@@ -1,4 +1,45 @@
 # Base driver and minimal action dispatching
+import socket
+
+
+def apply_socket_options(sock, extra_options=(), timeout=None):
+    """Tune a freshly connected printer socket for small-frame latency.
+
+    Printer traffic is tiny command frames followed by an immediate recv;
+    Nagle coalescing would tax every frame with up to ~40ms, so TCP_NODELAY
+    always goes on, plus TCP_QUICKACK where the platform has it (Linux) and
+    SO_KEEPALIVE so pooled idle connections do not die silently between
+    receipts. Keepalive cadence and TCP_USER_TIMEOUT (derived from the
+    adapter ``timeout``) are tightened where the platform exposes them, so
+    a printer yanked off the network surfaces as an error within seconds
+    rather than after the kernel defaults. Send/receive buffers are sized
+    for a full batched receipt. ``extra_options`` is an iterable of
+    (level, optname, value) applied last, kafka-python style, so
+    deployments can override any of this.
+    """
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 65536)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
+    if hasattr(socket, 'TCP_QUICKACK'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 5)
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 3)
+    if hasattr(socket, 'TCP_KEEPCNT'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+    if timeout and hasattr(socket, 'TCP_USER_TIMEOUT'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, int(timeout * 1000))
+    for level, optname, value in extra_options:
+        sock.setsockopt(level, optname, value)
+
+
+class TransientPrinterError(Exception):
+    """Expected, recoverable printer failure (offline, timeout, half-open
+    socket). Callers handle it without traceback logging; anything else is a
+    genuine bug and keeps the full exception treatment."""
+
 
 class BaseDriver:
     def __init__(self, printer=None, env=None, escpos_factory=None, socket_factory=None, iot_proxy=None):
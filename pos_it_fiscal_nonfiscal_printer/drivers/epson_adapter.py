@@ -0,0 +1,18 @@
+# Epson ePOS adapter: thin delegation layer
+#
+# Per DEVELOPMENT.md this driver should reuse `epson_epos` / IoT proxy logic
+# rather than talk ePOS XML itself. It therefore only forwards actions to an
+# injected proxy; direct ePOS support stays out of scope.
+from .base import BaseDriver
+
+
+class EpsonAdapter(BaseDriver):
+    def print_receipt(self, payload):
+        if self.iot_proxy is not None:
+            return self.iot_proxy.print_receipt(payload)
+        raise NotImplementedError('epson_epos printing requires an IoT proxy')
+
+    def open_cashbox(self, payload):
+        if self.iot_proxy is not None:
+            return self.iot_proxy.open_cashbox(payload)
+        raise NotImplementedError('epson_epos cashbox requires an IoT proxy')
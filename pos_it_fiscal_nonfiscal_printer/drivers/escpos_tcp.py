@@ -0,0 +1,234 @@
+# ESC/POS adapter (raw TCP) + driver wrapper
+#
+# Direct-socket ESC/POS implementation used for kitchen/order ("comanda")
+# printing when no IoT box is involved. Mirrors the byte sequences produced by
+# `example/main.py` through python-escpos, without the external dependency.
+import socket
+import time
+
+from . import _codec
+from .base import BaseDriver, TransientPrinterError, apply_socket_options
+
+
+class ESCPOSPrinterAdapter:
+    """Low-level ESC/POS over a TCP socket (usually port 9100).
+
+    All print methods return (success, message) tuples; connection errors are
+    reported the same way instead of raising.
+    """
+
+    # command bytes are defined once in _codec and mirrored here so the
+    # adapter API keeps its historical class attributes
+    LF = _codec.LF
+
+    CMD_INIT = _codec.CMD_INIT
+    CMD_ALIGN_LEFT = _codec.CMD_ALIGN_LEFT
+    CMD_ALIGN_CENTER = _codec.CMD_ALIGN_CENTER
+    CMD_ALIGN_RIGHT = _codec.CMD_ALIGN_RIGHT
+    CMD_BOLD_ON = _codec.CMD_BOLD_ON
+    CMD_BOLD_OFF = _codec.CMD_BOLD_OFF
+    CMD_UNDERLINE_ON = _codec.CMD_UNDERLINE_ON
+    CMD_UNDERLINE_OFF = _codec.CMD_UNDERLINE_OFF
+    CMD_SIZE_NORMAL = _codec.CMD_SIZE_NORMAL
+    CMD_SIZE_DOUBLE = _codec.CMD_SIZE_DOUBLE
+    CMD_PARTIAL_CUT = _codec.CMD_PARTIAL_CUT
+    CMD_FULL_CUT = _codec.CMD_FULL_CUT
+    CMD_OPEN_DRAWER = _codec.CMD_OPEN_DRAWER
+    # DLE EOT 1: real-time "transmit printer status", answered with one
+    # status byte without touching the print buffer
+    CMD_STATUS_QUERY = _codec.CMD_STATUS_QUERY
+
+    # all eight (align, bold, underline) combinations -> (prefix, suffix),
+    # so print_text assembles a line from two lookups instead of rebuilding
+    # the command run piece by piece
+    _FMT_TABLE = {}
+    for _align, _align_cmd in (
+            ('left', CMD_ALIGN_LEFT), ('center', CMD_ALIGN_CENTER), ('right', CMD_ALIGN_RIGHT)):
+        for _bold in (False, True):
+            for _underline in (False, True):
+                _FMT_TABLE[(_align, _bold, _underline)] = (
+                    _align_cmd
+                    + (CMD_BOLD_ON if _bold else b'')
+                    + (CMD_UNDERLINE_ON if _underline else b''),
+                    (CMD_BOLD_OFF if _bold else b'')
+                    + (CMD_UNDERLINE_OFF if _underline else b''),
+                )
+    del _align, _align_cmd, _bold, _underline
+
+    def __init__(self, ip, port=9100, timeout=10, width=32, socket_options=()):
+        self.ip = ip
+        self.port = port
+        self.timeout = timeout
+        self.width = width
+        self.socket_options = socket_options
+        self.status_cache_ttl = 1.0
+        self.socket = None
+        self._last_probe_ts = 0.0
+        self._last_status = None
+        # separator depends only on the configured width; built once
+        self._sep_line = b'-' * width + self.LF
+
+    def connect(self):
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.settimeout(self.timeout)
+            self.socket.connect((self.ip, self.port))
+            apply_socket_options(self.socket, self.socket_options, self.timeout)
+            self._send_raw(self.CMD_INIT)
+            return True, 'connected'
+        except (socket.timeout, OSError) as e:
+            self.socket = None
+            return False, str(e)
+
+    def disconnect(self):
+        if self.socket is not None:
+            try:
+                self.socket.close()
+            except OSError:
+                pass
+            self.socket = None
+
+    def _send_raw(self, data):
+        """Send bytes, or a list of byte pieces without joining them first.
+
+        A parts list goes out via sendmsg (scatter-gather writev: one
+        syscall, no copy into a joined buffer); platforms without sendmsg
+        fall back to join + sendall.
+        """
+        if self.socket is None:
+            raise TransientPrinterError('order printer not connected')
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            self.socket.sendall(data)
+            return
+        sendmsg = getattr(self.socket, 'sendmsg', None)
+        if sendmsg is None:
+            self.socket.sendall(b''.join(data))
+            return
+        buffers = [memoryview(part) for part in data if part]
+        while buffers:
+            sent = sendmsg(buffers)
+            # drop fully sent buffers, trim a partially sent one
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers[0])
+                del buffers[0]
+            if sent:
+                buffers[0] = buffers[0][sent:]
+
+    def get_status(self):
+        # Real-time DLE EOT status query: one status byte back, nothing
+        # moves on the printer. Re-sending CMD_INIT here (the old probe)
+        # would reset formatting state and never answers anyway. Polls
+        # within the TTL reuse the last answer to keep 1 Hz dashboards off
+        # the wire. Timing, when wanted, is measured by the caller.
+        now = time.monotonic()
+        if self._last_status is not None and now - self._last_probe_ts < self.status_cache_ttl:
+            return self._last_status
+        self._send_raw(self.CMD_STATUS_QUERY)
+        status_byte = self._receive_status_byte()
+        if status_byte is None:
+            status = {'status': 'error', 'ready': False, 'message': 'no status response'}
+        else:
+            # bit 3 of the DLE EOT 1 answer: printer offline
+            offline = bool(status_byte & 0x08)
+            status = {
+                'status': 'offline' if offline else 'ready',
+                'ready': not offline,
+                'message': '',
+            }
+        self._last_probe_ts = now
+        self._last_status = status
+        return status
+
+    def _receive_status_byte(self):
+        try:
+            data = self.socket.recv(1)
+        except (socket.timeout, OSError):
+            return None
+        return data[0] if data else None
+
+    def _format_text(self, text, align, bold, underline):
+        # unknown align values fall back to left, as the branchy version did
+        prefix, suffix = self._FMT_TABLE.get(
+            (align, bold, underline), self._FMT_TABLE[('left', bold, underline)])
+        return prefix + text.encode('utf-8', errors='ignore') + self.LF + suffix
+
+    def print_text(self, text, align='left', bold=False, underline=False):
+        try:
+            self._send_raw(self._format_text(text, align, bold, underline))
+            return True, 'text printed'
+        except (socket.timeout, OSError) as e:
+            return False, str(e)
+
+    def print_comanda(self, order_data, auto_cut=True, open_drawer=False):
+        try:
+            # cut/drawer ride along in the same write: the parts list goes
+            # out as one scatter-gather send, never joined in Python
+            parts = self._build_comanda_parts(order_data)
+            if auto_cut:
+                parts.append(self.CMD_PARTIAL_CUT)
+            if open_drawer:
+                parts.append(self.CMD_OPEN_DRAWER)
+            self._send_raw(parts)
+            return True, 'comanda printed'
+        except (socket.timeout, OSError) as e:
+            return False, str(e)
+
+    def cut_paper(self, partial=True):
+        try:
+            self._send_raw(self.CMD_PARTIAL_CUT if partial else self.CMD_FULL_CUT)
+            return True, 'paper cut'
+        except (socket.timeout, OSError) as e:
+            return False, str(e)
+
+    def open_drawer(self):
+        try:
+            self._send_raw(self.CMD_OPEN_DRAWER)
+            return True, 'drawer opened'
+        except (socket.timeout, OSError) as e:
+            return False, str(e)
+
+    def line_feed(self, lines=1):
+        try:
+            self._send_raw(self.LF * lines)
+            return True, 'fed'
+        except (socket.timeout, OSError) as e:
+            return False, str(e)
+
+    def _separator_line(self):
+        return '-' * self.width
+
+    def _build_comanda_document(self, order_data):
+        return b''.join(self._build_comanda_parts(order_data))
+
+    def _build_comanda_parts(self, order_data):
+        return _codec.build_comanda_parts(order_data, self.width, self._sep_line)
+
+
+class EscposTCPDriver(BaseDriver):
+    """`BaseDriver` wrapper delegating print actions to the TCP adapter."""
+
+    def __init__(self, printer=None, env=None, adapter=None, **kwargs):
+        super().__init__(printer=printer, env=env, **kwargs)
+        if adapter is None and printer is not None and getattr(printer, 'proxy_ip', None):
+            adapter = ESCPOSPrinterAdapter(printer.proxy_ip)
+        self.adapter = adapter
+
+    def print_receipt(self, payload):
+        if self.adapter is None:
+            raise ValueError('escpos_tcp printer has no network address configured')
+        if not self.adapter.socket:
+            success, message = self.adapter.connect()
+            if not success:
+                return {'result': False, 'error': message}
+        success, message = self.adapter.print_comanda(payload)
+        return {'result': success, 'info': message}
+
+    def open_cashbox(self, payload):
+        if self.adapter is None:
+            raise ValueError('escpos_tcp printer has no network address configured')
+        if not self.adapter.socket:
+            success, message = self.adapter.connect()
+            if not success:
+                return {'result': False, 'error': message}
+        success, message = self.adapter.open_drawer()
+        return {'result': success, 'info': message}
@@ -0,0 +1,377 @@
+# SF20-like fiscal printer adapter (TCP) + driver wrapper
+#
+# The protocol implemented here is the minimal SF20-style framing described in
+# DEVELOPMENT.md: STX-prefixed command frames terminated by EOT, with textual
+# status markers in responses. It is plumbing for integration work and is NOT
+# certified fiscal firmware (see README).
+import socket
+import struct
+
+from . import _codec
+from .base import BaseDriver, TransientPrinterError, apply_socket_options
+
+
+def _cents(value):
+    # int(value * 100) truncates: int(0.29 * 100) == 28 on binary floats
+    return int(round(float(value) * 100))
+
+
+class SF20FiscalPrinterAdapter:
+    """Low-level SF20 fiscal protocol over a TCP socket.
+
+    Lifecycle: connect() -> open_receipt() -> add_item()* -> process_payment()*
+    -> close_receipt(). All methods return (success, message_or_value) tuples
+    and never raise for protocol-level failures.
+    """
+
+    SF20_HEADER = b'\x02\x30'
+    SF20_EOT = b'\x04'
+
+    CMD_STATUS = b'S'
+    CMD_OPEN = b'O'
+    CMD_ITEM = b'I'
+    CMD_PAYMENT = b'P'
+    CMD_CLOSE = b'C'
+    CMD_Z_REPORT = b'Z'
+
+    # precomputed frame pieces for the batched receipt builder
+    _FRAME_OPEN = SF20_HEADER + CMD_OPEN + SF20_EOT
+    _FRAME_CLOSE = SF20_HEADER + CMD_CLOSE + SF20_EOT
+    _ITEM_PREFIX = SF20_HEADER + CMD_ITEM
+    _PAYMENT_PREFIX = SF20_HEADER + CMD_PAYMENT
+
+    # common spellings preseeded so the hot path is one dict hit with no
+    # .lower() allocation; anything else falls back to a lowercased lookup
+    _PAYMENT_CODES = {}
+    for _name, _code in (('cash', 0x01), ('card', 0x02), ('check', 0x03), ('other', 0x04)):
+        _PAYMENT_CODES[_name] = _code
+        _PAYMENT_CODES[_name.upper()] = _code
+        _PAYMENT_CODES[_name.capitalize()] = _code
+    del _name, _code
+
+    STATE_RECEIPT_CLOSED = _codec.STATE_RECEIPT_CLOSED
+    STATE_RECEIPT_OPEN = _codec.STATE_RECEIPT_OPEN
+    STATE_Z_REQUIRED = _codec.STATE_Z_REQUIRED
+    STATE_MEMORY_FULL = _codec.STATE_MEMORY_FULL
+    STATE_ERROR = _codec.STATE_ERROR
+
+    def __init__(self, ip, port=9100, timeout=10, socket_options=()):
+        self.ip = ip
+        self.port = port
+        self.timeout = timeout
+        self.socket_options = socket_options
+        self.socket = None
+        # long-lived receive buffer: recv_into lands bytes straight in it
+        # instead of allocating a fresh bytes object per recv; _rx_len
+        # tracks the filled prefix, and bytes past a consumed frame carry
+        # over to the next call
+        self._rx_buf = bytearray(8192)
+        self._rx_len = 0
+        # transmit slab: single-command frames are assembled in place and
+        # sent as a memoryview slice, no per-call concatenation chain
+        self._tx_buf = bytearray(256)
+        # where _next_frame found EOT in the last returned frame; None when
+        # no complete frame has been seen yet
+        self._last_eot_idx = None
+
+    def connect(self):
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.settimeout(self.timeout)
+            self.socket.connect((self.ip, self.port))
+            apply_socket_options(self.socket, self.socket_options, self.timeout)
+            return True, 'connected'
+        except (socket.timeout, OSError) as e:
+            self.socket = None
+            return False, str(e)
+
+    def disconnect(self):
+        if self.socket is not None:
+            try:
+                self.socket.close()
+            except OSError:
+                pass
+            self.socket = None
+            self._rx_len = 0  # drop any tail from the dead connection
+            self._last_eot_idx = None
+
+    def _send_command(self, command, data=b''):
+        if self.socket is None:
+            raise TransientPrinterError('fiscal printer not connected')
+        frame_len = 3 + len(command) + len(data)
+        tx = self._tx_buf
+        if frame_len > len(tx):
+            self._tx_buf = tx = bytearray(frame_len)
+        tx[0:2] = self.SF20_HEADER
+        offset = 2 + len(command)
+        tx[2:offset] = command
+        end = offset + len(data)
+        tx[offset:end] = data
+        tx[end:end + 1] = self.SF20_EOT
+        self.socket.sendall(memoryview(tx)[:end + 1])
+        return self._receive_response()
+
+    def _receive_response(self):
+        return self._next_frame()
+
+    def _next_frame(self):
+        """Return one EOT-terminated frame out of the persistent buffer,
+        receiving more data as needed; a peer close yields whatever partial
+        data was pending (possibly b'').
+
+        Bytes past the frame stay in the buffer for the next call, so
+        pipelined responses that share a recv are never lost.
+        """
+        buf = self._rx_buf
+        eot = self.SF20_EOT
+        scan_from = 0
+        while True:
+            idx = buf.find(eot, scan_from, self._rx_len)
+            if idx >= 0:
+                end = idx + 1
+                frame = bytes(buf[:end])
+                tail = self._rx_len - end
+                if tail:
+                    buf[:tail] = buf[end:self._rx_len]
+                self._rx_len = tail
+                self._last_eot_idx = idx
+                return frame
+            if self._rx_len == len(buf):
+                # a frame larger than the buffer: double capacity
+                buf.extend(bytes(len(buf)))
+            scan_from = self._rx_len
+            received = self.socket.recv_into(memoryview(buf)[self._rx_len:])
+            if not received:
+                frame = bytes(buf[:self._rx_len])
+                self._rx_len = 0
+                self._last_eot_idx = None  # partial frame, no terminator
+                return frame
+            self._rx_len += received
+
+    def get_status(self):
+        # timing, when wanted, is measured by the caller around this call
+        response = self._send_command(self.CMD_STATUS)
+        status, ready = self._parse_status_response(response)
+        return {'status': status, 'ready': ready, 'message': ''}
+
+    # response parsing lives in _codec (a self-contained, optionally
+    # compiled module); the staticmethod bindings keep the historical
+    # method names on the adapter
+    _parse_status_response = staticmethod(_codec.parse_status)
+    _parse_receipt_number = staticmethod(_codec.parse_receipt_number)
+    _parse_error_response = staticmethod(_codec.parse_error)
+
+    def _is_success_response(self, response):
+        # the EOT position recorded by _next_frame makes the ACK-before-EOT
+        # check constant time with no scan at all; it only describes the most
+        # recent frame, so when checking an older one (send_and_close grades
+        # a whole batch after collecting it) _codec.is_success re-derives
+        # the index from the frame end, which is equally O(1)
+        eot_idx = self._last_eot_idx
+        if eot_idx is not None and eot_idx != len(response) - 1:
+            eot_idx = None
+        return _codec.is_success(response, eot_idx)
+
+    def open_receipt(self):
+        response = self._send_command(self.CMD_OPEN)
+        if self._is_success_response(response):
+            return True, 'receipt opened'
+        return False, self._parse_error_response(response)
+
+    def add_item(self, description, quantity, unit_price, tax_percent):
+        return self.add_item_cents(
+            description, _cents(quantity), _cents(unit_price), int(tax_percent))
+
+    def add_item_cents(self, description, quantity_cents, price_cents, tax_int):
+        """Integer-cent variant of add_item for callers that already hold
+        exact cent amounts; no float round-trip at all."""
+        data = self._encode_item(description, quantity_cents, price_cents, tax_int)
+        response = self._send_command(self.CMD_ITEM, data)
+        if self._is_success_response(response):
+            return True, 'item added'
+        return False, self._parse_error_response(response)
+
+    def process_payment(self, payment_type, amount):
+        return self.process_payment_cents(payment_type, _cents(amount))
+
+    def process_payment_cents(self, payment_type, amount_cents):
+        payment_code = self._encode_payment_type(payment_type)
+        data = self._encode_payment(payment_code, amount_cents)
+        response = self._send_command(self.CMD_PAYMENT, data)
+        if self._is_success_response(response):
+            return True, 'payment accepted'
+        return False, self._parse_error_response(response)
+
+    def close_receipt(self):
+        response = self._send_command(self.CMD_CLOSE)
+        if self._is_success_response(response):
+            return True, self._parse_receipt_number(response)
+        return False, self._parse_error_response(response)
+
+    def z_report(self):
+        response = self._send_command(self.CMD_Z_REPORT)
+        if self._is_success_response(response):
+            return True, 'Z report printed'
+        return False, self._parse_error_response(response)
+
+    def build_receipt(self, items, payments):
+        """Concatenate the open/item/payment/close frames of a whole receipt.
+
+        Returns (frame_bytes, command_count). SF20-family printers accept
+        back-to-back frames and answer one EOT-terminated response per
+        command, so a receipt can be sent with a single write instead of one
+        round-trip per command.
+        """
+        # everything the per-line loops touch is bound to locals; with the
+        # class-level frame pieces this keeps the builder to a few bytecodes
+        # per field even for 50-line receipts
+        parts = [self._FRAME_OPEN]
+        append = parts.append
+        encode_item = self._encode_item
+        encode_payment = self._encode_payment
+        encode_payment_type = self._encode_payment_type
+        item_prefix = self._ITEM_PREFIX
+        payment_prefix = self._PAYMENT_PREFIX
+        eot = self.SF20_EOT
+        for item in items:
+            data = encode_item(
+                item.get('description', 'ITEM'),
+                _cents(item.get('quantity', 1)),
+                _cents(item.get('unit_price', 0)),
+                int(float(item.get('tax_percent', 0))),
+            )
+            append(item_prefix + data + eot)
+        for payment in payments:
+            data = encode_payment(
+                encode_payment_type(payment.get('type', 'cash')),
+                _cents(payment.get('amount', 0)),
+            )
+            append(payment_prefix + data + eot)
+        append(self._FRAME_CLOSE)
+        return b''.join(parts), len(parts)
+
+    def send_and_close(self, frame, expected_responses):
+        """Send a batched receipt frame and collect the per-command statuses.
+
+        Returns (success, receipt_number_or_error, statuses) where statuses
+        is one boolean per command in send order.
+        """
+        self.socket.sendall(frame)
+        responses = self._receive_frames(expected_responses)
+        statuses = [self._is_success_response(response) for response in responses]
+        for response, ok in zip(responses, statuses):
+            if not ok:
+                return False, self._parse_error_response(response), statuses
+        if len(responses) < expected_responses:
+            return False, 'incomplete response from printer', statuses
+        return True, self._parse_receipt_number(responses[-1]), statuses
+
+    def _receive_frames(self, count):
+        return list(self._iter_frames(count))
+
+    def _iter_frames(self, count):
+        """Yield up to ``count`` EOT-terminated frames as they arrive,
+        stopping early when the peer closes mid-stream."""
+        eot = self.SF20_EOT
+        for _dummy in range(count):
+            frame = self._next_frame()
+            if not frame.endswith(eot):
+                return
+            yield frame
+
+    def add_items_bulk(self, items):
+        """Pipeline the item frames of a receipt: send them all back-to-back,
+        then collect one response per frame.
+
+        Items use the same dict shape as build_receipt. Per-command
+        request/response costs N round-trips for N items; pipelining costs
+        one send plus the printer's parse time per item. Returns a list of
+        (success, message) pairs, one per item in order.
+        """
+        if self.socket is None:
+            raise TransientPrinterError('fiscal printer not connected')
+        if not items:
+            return []
+        encode_item = self._encode_item
+        item_prefix = self._ITEM_PREFIX
+        eot = self.SF20_EOT
+        frames = [
+            item_prefix + encode_item(
+                item.get('description', 'ITEM'),
+                _cents(item.get('quantity', 1)),
+                _cents(item.get('unit_price', 0)),
+                int(float(item.get('tax_percent', 0))),
+            ) + eot
+            for item in items
+        ]
+        self.socket.sendall(b''.join(frames))
+        results = [
+            (True, 'item added') if self._is_success_response(response)
+            else (False, self._parse_error_response(response))
+            for response in self._iter_frames(len(frames))
+        ]
+        while len(results) < len(frames):
+            results.append((False, 'no response from printer'))
+        return results
+
+    # binary item layout: desc[40] space-padded, qty/price in cents, tax
+    # percent, one reserved byte; parsed once at class load so per-item
+    # encoding skips the format-string parse of module-level struct.pack
+    _ITEM_STRUCT = struct.Struct('>40sIIIB')
+
+    def _encode_item(self, description, quantity_cents, price_cents, tax_int):
+        return self._ITEM_STRUCT.pack(
+            description.encode('utf-8', errors='ignore')[:40].ljust(40, b' '),
+            quantity_cents, price_cents, tax_int, 0)
+
+    def _encode_payment_type(self, payment_type):
+        code = self._PAYMENT_CODES.get(payment_type)
+        if code is None:
+            code = self._PAYMENT_CODES.get(payment_type.lower(), 0x04)
+        return code
+
+    _PAYMENT_STRUCT = struct.Struct('>BI')
+
+    def _encode_payment(self, payment_code, amount_cents):
+        return self._PAYMENT_STRUCT.pack(payment_code, amount_cents)
+
+
+class SF20Driver(BaseDriver):
+    """`BaseDriver` wrapper exposing the fiscal lifecycle as proxy actions."""
+
+    def __init__(self, printer=None, env=None, adapter=None, **kwargs):
+        super().__init__(printer=printer, env=env, **kwargs)
+        if adapter is None and printer is not None and getattr(printer, 'proxy_ip', None):
+            adapter = SF20FiscalPrinterAdapter(printer.proxy_ip)
+        self.adapter = adapter
+
+    def print_receipt(self, payload):
+        if self.adapter is None:
+            raise ValueError('sf20_tcp printer has no network address configured')
+        if not self.adapter.socket:
+            success, message = self.adapter.connect()
+            if not success:
+                return {'result': False, 'error': message}
+        success, message = self.adapter.open_receipt()
+        if not success:
+            return {'result': False, 'error': message}
+        for item in payload.get('items', []):
+            success, message = self.adapter.add_item(
+                item.get('description', 'ITEM'),
+                float(item.get('quantity', 1)),
+                float(item.get('unit_price', 0)),
+                float(item.get('tax_percent', 0)),
+            )
+            if not success:
+                return {'result': False, 'error': message}
+        for payment in payload.get('payments', []):
+            success, message = self.adapter.process_payment(
+                payment.get('type', 'cash'),
+                float(payment.get('amount', 0)),
+            )
+            if not success:
+                return {'result': False, 'error': message}
+        success, receipt_number = self.adapter.close_receipt()
+        if not success:
+            return {'result': False, 'error': receipt_number}
+        return {'result': True, 'receipt_number': receipt_number}
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import pos_config
+from . import pos_printer_status
+from . import pos_session
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class PosConfig(models.Model):
+    _inherit = 'pos.config'
+
+    fiscal_printer_enabled = fields.Boolean(string="Fiscal Printer Enabled")
+    fiscal_printer_ip = fields.Char(string="Fiscal Printer IP")
+    fiscal_printer_port = fields.Integer(string="Fiscal Printer Port", default=9100)
+    fiscal_printer_timeout = fields.Integer(string="Fiscal Printer Timeout (s)", default=10)
+    fiscal_printer_fail_safe = fields.Boolean(
+        string="Fiscal Fail-Safe",
+        default=True,
+        help="Abort the whole receipt when a single item or payment is refused.",
+    )
+    fiscal_printer_supports_batching = fields.Boolean(
+        string="Fiscal Batched Receipts",
+        default=True,
+        help="Send the whole receipt in one write instead of one round-trip "
+             "per command (supported by SF20-family firmware).",
+    )
+
+    nonfiscal_printer_enabled = fields.Boolean(string="Order Printer Enabled")
+    nonfiscal_printer_ip = fields.Char(string="Order Printer IP")
+    nonfiscal_printer_port = fields.Integer(string="Order Printer Port", default=9100)
+    nonfiscal_printer_timeout = fields.Integer(string="Order Printer Timeout (s)", default=10)
+    nonfiscal_printer_width = fields.Integer(string="Order Printer Width (chars)", default=32)
+    nonfiscal_printer_auto_cut = fields.Boolean(string="Auto Cut", default=True)
+    nonfiscal_printer_open_drawer = fields.Boolean(string="Open Drawer After Comanda")
+
+    _PRINTER_FIELDS = frozenset({
+        'fiscal_printer_enabled', 'fiscal_printer_ip', 'fiscal_printer_port',
+        'fiscal_printer_timeout', 'fiscal_printer_fail_safe',
+        'fiscal_printer_supports_batching',
+        'nonfiscal_printer_enabled', 'nonfiscal_printer_ip',
+        'nonfiscal_printer_port', 'nonfiscal_printer_timeout',
+        'nonfiscal_printer_width', 'nonfiscal_printer_auto_cut',
+        'nonfiscal_printer_open_drawer',
+    })
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._PRINTER_FIELDS.intersection(vals):
+            # drop the controller-side config/ETag caches and any pooled
+            # connection to the old address (imported lazily: models load
+            # before controllers)
+            from ..controllers.printer_controller import _invalidate_config_cache
+            from ..services.printer_factory import PrinterFactory
+            for config in self:
+                _invalidate_config_cache(config.id)
+                PrinterFactory.remove_printer(config.id)
+        return res
+
+    def get_fiscal_printer_config(self):
+        self.ensure_one()
+        return {
+            'ip': self.fiscal_printer_ip,
+            'port': self.fiscal_printer_port or 9100,
+            'timeout': self.fiscal_printer_timeout or 10,
+            'fail_safe': self.fiscal_printer_fail_safe,
+            'supports_batching': self.fiscal_printer_supports_batching,
+        }
+
+    def get_nonfiscal_printer_config(self):
+        self.ensure_one()
+        return {
+            'ip': self.nonfiscal_printer_ip,
+            'port': self.nonfiscal_printer_port or 9100,
+            'timeout': self.nonfiscal_printer_timeout or 10,
+            'width': self.nonfiscal_printer_width or 32,
+            'auto_cut': self.nonfiscal_printer_auto_cut,
+            'open_drawer': self.nonfiscal_printer_open_drawer,
+        }
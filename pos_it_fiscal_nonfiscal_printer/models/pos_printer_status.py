@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+
+
+class PosPrinterStatus(models.Model):
+    _name = 'pos.printer.status'
+    _description = 'PoS Printer Status'
+    _rec_name = 'pos_config_id'
+
+    pos_config_id = fields.Many2one('pos.config', required=True, index=True, ondelete='cascade')
+    kind = fields.Selection(
+        [('fiscal', 'Fiscal'), ('nonfiscal', 'Non-Fiscal')],
+        required=True,
+        index=True,
+    )
+    status = fields.Char()
+    ready = fields.Boolean()
+    message = fields.Char()
+    response_time_ms = fields.Float()
+    last_update = fields.Datetime()
+
+    @api.model
+    def update_fiscal_status(self, pos_config_id, status, ready, message='', response_time_ms=0.0):
+        return self._update_status('fiscal', pos_config_id, status, ready, message, response_time_ms)
+
+    @api.model
+    def update_nonfiscal_status(self, pos_config_id, status, ready, message='', response_time_ms=0.0):
+        return self._update_status('nonfiscal', pos_config_id, status, ready, message, response_time_ms)
+
+    @api.model
+    def _update_status(self, kind, pos_config_id, status, ready, message, response_time_ms):
+        values = {
+            'status': status,
+            'ready': ready,
+            'message': message or '',
+            'response_time_ms': response_time_ms,
+            'last_update': fields.Datetime.now(),
+        }
+        record = self.search([
+            ('pos_config_id', '=', pos_config_id),
+            ('kind', '=', kind),
+        ], limit=1)
+        if record:
+            record.write(values)
+        else:
+            values.update({'pos_config_id': pos_config_id, 'kind': kind})
+            record = self.create(values)
+        return record
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class PosSession(models.Model):
+    _inherit = 'pos.session'
+
+    fiscal_receipts_count = fields.Integer(
+        string="Fiscal Receipts",
+        default=0,
+        help="Number of fiscal receipts printed during this session.",
+    )
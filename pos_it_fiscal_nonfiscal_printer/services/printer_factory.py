@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Printer factory: pooled adapter instances, one per pos.config and kind.
+#
+# Sockets are kept alive between requests so the steady-state hot path pays
+# no TCP handshake: callers get a validated live connection or an error, and
+# a background reaper closes sockets that sat idle too long.
+import selectors
+import socket
+import threading
+import time
+
+from ..drivers.escpos_tcp import ESCPOSPrinterAdapter
+from ..drivers.sf20_tcp import SF20FiscalPrinterAdapter
+
+
+class _PooledPrinter:
+    __slots__ = ('adapter', 'last_used_ts', 'in_use')
+
+    def __init__(self, adapter):
+        self.adapter = adapter
+        self.last_used_ts = time.monotonic()
+        self.in_use = False
+
+
+class PrinterFactory:
+    # Close pooled sockets unused for this long; printers drop silent idle
+    # connections anyway and reconnecting off the hot path is cheap.
+    IDLE_TIMEOUT = 10.0
+    REAP_INTERVAL = 5.0
+
+    _pools = {'fiscal': {}, 'nonfiscal': {}}
+    _lock = threading.Lock()
+    _reaper = None
+
+    @classmethod
+    def get_or_connect(cls, kind, pos_config_id, config):
+        """Return (adapter, message) with a validated live socket for the
+        given pos.config, or (None, error_message) when connecting fails.
+
+        The entry is flagged in-use until release() so the reaper never
+        closes a socket mid-operation.
+        """
+        with cls._lock:
+            pool = cls._pools[kind]
+            entry = pool.get(pos_config_id)
+            if entry is None:
+                entry = _PooledPrinter(cls._create_adapter(kind, config))
+                pool[pos_config_id] = entry
+                cls._ensure_reaper()
+            entry.in_use = True
+            entry.last_used_ts = time.monotonic()
+            adapter = entry.adapter
+        if not cls._socket_alive(adapter.socket):
+            adapter.disconnect()
+            success, message = adapter.connect()
+            if not success:
+                cls.release(kind, pos_config_id)
+                return None, message
+        return adapter, 'connected'
+
+    @classmethod
+    def release(cls, kind, pos_config_id):
+        with cls._lock:
+            entry = cls._pools[kind].get(pos_config_id)
+            if entry is not None:
+                entry.in_use = False
+                entry.last_used_ts = time.monotonic()
+
+    @classmethod
+    def remove_printer(cls, pos_config_id):
+        with cls._lock:
+            entries = [
+                pool.pop(pos_config_id, None)
+                for pool in cls._pools.values()
+            ]
+        for entry in entries:
+            if entry is not None:
+                entry.adapter.disconnect()
+
+    @staticmethod
+    def _create_adapter(kind, config):
+        if kind == 'fiscal':
+            return SF20FiscalPrinterAdapter(
+                config['ip'],
+                config.get('port', 9100),
+                config.get('timeout', 10),
+            )
+        return ESCPOSPrinterAdapter(
+            config['ip'],
+            config.get('port', 9100),
+            config.get('timeout', 10),
+            config.get('width', 32),
+        )
+
+    @staticmethod
+    def _socket_alive(sock):
+        """Cheap liveness probe: a zero-timeout selector poll (epoll on
+        Linux) reports peer hangup instantly; only when the socket is
+        readable is a MSG_PEEK needed to tell pending data from EOF. No
+        protocol bytes are consumed either way."""
+        if sock is None:
+            return False
+        try:
+            sel = selectors.DefaultSelector()
+            try:
+                sel.register(sock, selectors.EVENT_READ)
+                readable = sel.select(0)
+            finally:
+                sel.close()
+            if not readable:
+                # no pending data, no pending FIN: connection is idle-alive
+                return True
+            original_timeout = sock.gettimeout()
+            sock.settimeout(0)
+            try:
+                return sock.recv(1, socket.MSG_PEEK) != b''
+            except (BlockingIOError, InterruptedError):
+                return True
+            finally:
+                sock.settimeout(original_timeout)
+        except (OSError, ValueError):
+            # closed/invalid file descriptors fail selector registration
+            return False
+
+    @classmethod
+    def _ensure_reaper(cls):
+        # caller holds cls._lock
+        if cls._reaper is None:
+            cls._reaper = threading.Thread(
+                target=cls._reap_loop, name='pos_printer_pool_reaper', daemon=True)
+            cls._reaper.start()
+
+    @classmethod
+    def _reap_loop(cls):
+        while True:
+            time.sleep(cls.REAP_INTERVAL)
+            deadline = time.monotonic() - cls.IDLE_TIMEOUT
+            with cls._lock:
+                idle = [
+                    entry
+                    for pool in cls._pools.values()
+                    for entry in pool.values()
+                    if not entry.in_use
+                    and entry.last_used_ts < deadline
+                    and entry.adapter.socket is not None
+                ]
+            for entry in idle:
+                entry.adapter.disconnect()
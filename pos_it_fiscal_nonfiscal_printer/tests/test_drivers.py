@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+# Driver unit tests: no real hardware, sockets are replaced by an in-memory
+# fake that records bytes sent and replays canned responses.
+import asyncio
+import unittest
+
+from ..drivers.aio import (
+    AsyncESCPOSPrinterAdapter,
+    AsyncSF20FiscalPrinterAdapter,
+    print_comande_fanout,
+)
+from ..drivers.escpos_tcp import ESCPOSPrinterAdapter
+from ..drivers.sf20_tcp import SF20FiscalPrinterAdapter
+
+
+class FakeSocket:
+    def __init__(self, responses=None, sendmsg_limit=None):
+        self.sent = b''
+        self.closed = False
+        self.sendmsg_limit = sendmsg_limit
+        self._responses = list(responses or [])
+
+    def sendall(self, data):
+        self.sent += bytes(data)
+
+    def sendmsg(self, buffers):
+        data = b''.join(bytes(buffer) for buffer in buffers)
+        if self.sendmsg_limit is not None:
+            data = data[:self.sendmsg_limit]
+        self.sent += data
+        return len(data)
+
+    def recv(self, bufsize):
+        if self._responses:
+            return self._responses.pop(0)
+        return b''
+
+    def recv_into(self, buffer, nbytes=0):
+        data = self.recv(nbytes or len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def settimeout(self, timeout):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class TestSF20Adapter(unittest.TestCase):
+    def _adapter(self, responses=None):
+        adapter = SF20FiscalPrinterAdapter('127.0.0.1')
+        adapter.socket = FakeSocket(responses)
+        return adapter
+
+    def test_command_framing(self):
+        adapter = self._adapter([b'OK\x04'])
+        adapter._send_command(adapter.CMD_OPEN, b'DATA')
+        self.assertEqual(
+            adapter.socket.sent,
+            adapter.SF20_HEADER + adapter.CMD_OPEN + b'DATA' + adapter.SF20_EOT,
+        )
+
+    def test_receive_response_spanning_chunks(self):
+        adapter = self._adapter([b'RECEIPT ', b'12345 OK', b'\x04'])
+        response = adapter._send_command(adapter.CMD_CLOSE)
+        self.assertEqual(response, b'RECEIPT 12345 OK\x04')
+
+    def test_response_tail_carries_over(self):
+        # two pipelined responses in one recv: the second frame must survive
+        # in the persistent buffer until the next read
+        adapter = self._adapter([b'OK\x04OK 0042\x04'])
+        self.assertEqual(adapter._send_command(adapter.CMD_OPEN), b'OK\x04')
+        self.assertEqual(adapter._send_command(adapter.CMD_CLOSE), b'OK 0042\x04')
+
+    def test_status_parsing(self):
+        adapter = self._adapter()
+        self.assertEqual(
+            adapter._parse_status_response(b'STATUS READY\x04'),
+            (adapter.STATE_RECEIPT_CLOSED, True),
+        )
+        self.assertEqual(
+            adapter._parse_status_response(b'Z_REQUIRED\x04'),
+            (adapter.STATE_Z_REQUIRED, False),
+        )
+        self.assertEqual(
+            adapter._parse_status_response(b'garbage'),
+            (adapter.STATE_ERROR, False),
+        )
+
+    def test_close_receipt_returns_number(self):
+        adapter = self._adapter([b'OK 0042\x04'])
+        success, receipt_number = adapter.close_receipt()
+        self.assertTrue(success)
+        self.assertEqual(receipt_number, '0042')
+
+    def test_ack_before_eot_is_success(self):
+        # ACK adjacent to the terminator: the constant-time tail window
+        # accepts it even when no OK marker leads the frame
+        adapter = self._adapter([b'RECEIPT DONE\x06\x04'])
+        success, _message = adapter.open_receipt()
+        self.assertTrue(success)
+
+    def test_error_response(self):
+        adapter = self._adapter([b'ERROR 12 paper out\x04'])
+        success, message = adapter.open_receipt()
+        self.assertFalse(success)
+        self.assertIn('ERROR 12', message)
+
+    def test_build_receipt_batches_all_commands(self):
+        adapter = self._adapter()
+        frame, command_count = adapter.build_receipt(
+            [{'description': 'Pizza', 'quantity': 1, 'unit_price': 8.0, 'tax_percent': 10}],
+            [{'type': 'cash', 'amount': 8.0}],
+        )
+        self.assertEqual(command_count, 4)  # open + item + payment + close
+        self.assertEqual(frame.count(adapter.SF20_EOT), 4)
+        self.assertTrue(frame.startswith(adapter.SF20_HEADER + adapter.CMD_OPEN))
+
+    def test_send_and_close_splits_combined_responses(self):
+        adapter = self._adapter([b'OK\x04OK\x04', b'OK\x04OK 0099\x04'])
+        frame, command_count = adapter.build_receipt(
+            [{'description': 'Pizza', 'quantity': 1, 'unit_price': 8.0, 'tax_percent': 10}],
+            [{'type': 'cash', 'amount': 8.0}],
+        )
+        success, receipt_number, statuses = adapter.send_and_close(frame, command_count)
+        self.assertTrue(success)
+        self.assertEqual(receipt_number, '0099')
+        self.assertEqual(statuses, [True, True, True, True])
+
+    def test_send_and_close_reports_failing_command(self):
+        adapter = self._adapter([b'OK\x04ERROR 04 vat\x04OK\x04OK\x04'])
+        frame, command_count = adapter.build_receipt(
+            [{'description': 'Pizza', 'quantity': 1, 'unit_price': 8.0, 'tax_percent': 10}],
+            [{'type': 'cash', 'amount': 8.0}],
+        )
+        success, message, _statuses = adapter.send_and_close(frame, command_count)
+        self.assertFalse(success)
+        self.assertIn('ERROR 04', message)
+
+    def test_add_items_bulk_pipelines_frames(self):
+        adapter = self._adapter([b'OK\x04ERROR 09 tax\x04'])
+        results = adapter.add_items_bulk([
+            {'description': 'Pizza', 'quantity': 1, 'unit_price': 8.0, 'tax_percent': 10},
+            {'description': 'Birra', 'quantity': 1, 'unit_price': 5.0, 'tax_percent': 22},
+        ])
+        # both frames went out in one write, before any response was read
+        self.assertEqual(adapter.socket.sent.count(adapter.SF20_EOT), 2)
+        self.assertEqual(results[0], (True, 'item added'))
+        self.assertFalse(results[1][0])
+        self.assertIn('ERROR 09', results[1][1])
+
+    def test_add_items_bulk_reports_missing_responses(self):
+        adapter = self._adapter([b'OK\x04'])
+        results = adapter.add_items_bulk([
+            {'description': 'Pizza'}, {'description': 'Birra'},
+        ])
+        self.assertEqual(results[0], (True, 'item added'))
+        self.assertEqual(results[1], (False, 'no response from printer'))
+
+    def test_cents_conversion_rounds(self):
+        from ..drivers.sf20_tcp import _cents
+        # int(0.29 * 100) == 28; rounding must not inherit that truncation
+        self.assertEqual(_cents(0.29), 29)
+        self.assertEqual(_cents(8.0), 800)
+        self.assertEqual(_cents('1.10'), 110)
+
+    def test_add_item_cents_skips_float_path(self):
+        adapter = self._adapter([b'OK\x04'])
+        success, message = adapter.add_item_cents('Pizza', 100, 800, 10)
+        self.assertTrue(success)
+        self.assertEqual(message, 'item added')
+
+    def test_item_encoding_layout(self):
+        adapter = self._adapter()
+        data = adapter._encode_item('Pizza', 100, 800, 10)
+        self.assertEqual(len(data), adapter._ITEM_STRUCT.size)
+        self.assertEqual(data[:40], b'Pizza'.ljust(40, b' '))
+        self.assertEqual(int.from_bytes(data[40:44], 'big'), 100)
+        self.assertEqual(int.from_bytes(data[44:48], 'big'), 800)
+        self.assertEqual(int.from_bytes(data[48:52], 'big'), 10)
+
+    def test_payment_encoding(self):
+        adapter = self._adapter()
+        self.assertEqual(adapter._encode_payment_type('cash'), 0x01)
+        self.assertEqual(adapter._encode_payment_type('CARD'), 0x02)
+        self.assertEqual(adapter._encode_payment_type('voucher'), 0x04)
+        self.assertEqual(
+            adapter._encode_payment(0x01, 1250),
+            b'\x01' + (1250).to_bytes(4, 'big'),
+        )
+
+
+class TestESCPOSAdapter(unittest.TestCase):
+    def _adapter(self):
+        adapter = ESCPOSPrinterAdapter('127.0.0.1')
+        adapter.socket = FakeSocket()
+        return adapter
+
+    def test_print_text_formatting(self):
+        adapter = self._adapter()
+        success, _message = adapter.print_text('Hello', align='center', bold=True)
+        self.assertTrue(success)
+        sent = adapter.socket.sent
+        self.assertIn(adapter.CMD_ALIGN_CENTER, sent)
+        self.assertIn(adapter.CMD_BOLD_ON, sent)
+        self.assertIn(b'Hello\n', sent)
+        self.assertIn(adapter.CMD_BOLD_OFF, sent)
+
+    def test_comanda_document_layout(self):
+        adapter = self._adapter()
+        document = adapter._build_comanda_document({
+            'service': {'type': 'TAVOLO', 'tavolo': 5, 'sala': 'A', 'operatore': 'Anna', 'coperti': 2},
+            'lines': [
+                {'qty': 2, 'description': 'Margherita', 'notes': 'no basilico'},
+                {'qty': 1, 'description': 'Acqua'},
+            ],
+            'datetime': '2024-01-01 12:00',
+        })
+        self.assertTrue(document.startswith(adapter.CMD_INIT))
+        self.assertIn(b'COMANDA\n', document)
+        self.assertIn(b'Tavolo: 5\n', document)
+        self.assertIn(b'2x Margherita\n', document)
+        self.assertIn(b'  no basilico\n', document)
+        self.assertIn(b'2024-01-01 12:00\n', document)
+
+    def test_get_status_parses_dle_eot_byte(self):
+        adapter = ESCPOSPrinterAdapter('127.0.0.1')
+        adapter.socket = FakeSocket([b'\x12'])
+        status = adapter.get_status()
+        self.assertTrue(status['ready'])
+        self.assertIn(adapter.CMD_STATUS_QUERY, adapter.socket.sent)
+
+    def test_get_status_cached_within_ttl(self):
+        adapter = ESCPOSPrinterAdapter('127.0.0.1')
+        adapter.socket = FakeSocket([b'\x1a'])  # bit 3 set: offline
+        first = adapter.get_status()
+        second = adapter.get_status()
+        self.assertFalse(first['ready'])
+        self.assertIs(second, first)
+        self.assertEqual(adapter.socket.sent.count(adapter.CMD_STATUS_QUERY), 1)
+
+    def test_comanda_truncates_before_encoding(self):
+        adapter = ESCPOSPrinterAdapter('127.0.0.1', width=10)
+        adapter.socket = FakeSocket()
+        document = adapter._build_comanda_document({
+            'lines': [{'qty': 1, 'description': 'Caff\xe8 lungo decaffeinato'}],
+        })
+        # width is applied to the string, so the multibyte e-grave survives
+        self.assertIn('1x Caff\xe8 l'.encode('utf-8') + b'\n', document)
+
+    def test_comanda_accepts_preencoded_lines(self):
+        adapter = ESCPOSPrinterAdapter('127.0.0.1')
+        adapter.socket = FakeSocket()
+        document = adapter._build_comanda_document({'lines': [b'2x Margherita']})
+        self.assertIn(b'2x Margherita\n', document)
+
+    def test_send_raw_vectored_handles_short_writes(self):
+        adapter = ESCPOSPrinterAdapter('127.0.0.1')
+        adapter.socket = FakeSocket(sendmsg_limit=3)
+        adapter._send_raw([b'abcd', b'ef', b'ghij'])
+        self.assertEqual(adapter.socket.sent, b'abcdefghij')
+
+    def test_print_comanda_cuts_paper(self):
+        adapter = self._adapter()
+        success, _message = adapter.print_comanda({'lines': []}, auto_cut=True)
+        self.assertTrue(success)
+        self.assertIn(adapter.CMD_PARTIAL_CUT, adapter.socket.sent)
+
+    def test_print_comanda_no_cut(self):
+        adapter = self._adapter()
+        adapter.print_comanda({'lines': []}, auto_cut=False)
+        self.assertNotIn(adapter.CMD_PARTIAL_CUT, adapter.socket.sent)
+
+
+class FakeStreamReader:
+    def __init__(self, responses=None):
+        self._responses = list(responses or [])
+
+    async def read(self, bufsize):
+        if self._responses:
+            return self._responses.pop(0)
+        return b''
+
+
+class FakeStreamWriter:
+    def __init__(self):
+        self.sent = b''
+
+    def write(self, data):
+        self.sent += bytes(data)
+
+    def writelines(self, data):
+        for part in data:
+            self.write(part)
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+class TestAsyncAdapters(unittest.TestCase):
+    def _sf20(self, responses=None):
+        adapter = AsyncSF20FiscalPrinterAdapter('127.0.0.1')
+        adapter._reader = FakeStreamReader(responses)
+        adapter._writer = FakeStreamWriter()
+        return adapter
+
+    def test_async_command_framing(self):
+        adapter = self._sf20([b'OK\x04'])
+        response = asyncio.run(adapter._send_command(adapter.CMD_OPEN, b'DATA'))
+        self.assertEqual(response, b'OK\x04')
+        self.assertEqual(
+            adapter._writer.sent,
+            adapter.SF20_HEADER + adapter.CMD_OPEN + b'DATA' + adapter.SF20_EOT,
+        )
+
+    def test_async_close_receipt_returns_number(self):
+        adapter = self._sf20([b'OK 0042\x04'])
+        success, receipt_number = asyncio.run(adapter.close_receipt())
+        self.assertTrue(success)
+        self.assertEqual(receipt_number, '0042')
+
+    def test_async_comanda_matches_sync_document(self):
+        order = {'service': {'type': 'BANCO'}, 'lines': [{'qty': 1, 'description': 'Acqua'}]}
+        adapter = AsyncESCPOSPrinterAdapter('127.0.0.1')
+        adapter._reader = FakeStreamReader()
+        adapter._writer = FakeStreamWriter()
+        success, _message = asyncio.run(adapter.print_comanda(order, auto_cut=False))
+        self.assertTrue(success)
+        sync_adapter = ESCPOSPrinterAdapter('127.0.0.1')
+        self.assertEqual(adapter._writer.sent, sync_adapter._build_comanda_document(order))
+
+
+class TestComandaFanout(unittest.TestCase):
+    def _connected_adapter(self):
+        adapter = AsyncESCPOSPrinterAdapter('127.0.0.1')
+        adapter._reader = FakeStreamReader()
+        adapter._writer = FakeStreamWriter()
+        return adapter
+
+    def test_fanout_prints_on_every_printer(self):
+        kitchen = self._connected_adapter()
+        bar = self._connected_adapter()
+        order = {'lines': [{'qty': 1, 'description': 'Acqua'}]}
+        results = asyncio.run(print_comande_fanout([(kitchen, order), (bar, order)]))
+        self.assertEqual(results, [(True, 'comanda printed')] * 2)
+        self.assertTrue(kitchen._writer.sent)
+        self.assertEqual(kitchen._writer.sent, bar._writer.sent)
+
+    def test_fanout_serializes_same_printer(self):
+        printer = self._connected_adapter()
+        orders = [{'lines': [{'qty': 1, 'description': f'Piatto {i}'}]} for i in range(3)]
+        results = asyncio.run(print_comande_fanout([(printer, o) for o in orders]))
+        self.assertEqual(results, [(True, 'comanda printed')] * 3)
+        # all three documents landed intact, in submission order
+        self.assertEqual(printer._writer.sent.count(b'Piatto'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()